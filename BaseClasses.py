@@ -5,6 +5,7 @@ import functools
 import logging
 import random
 import secrets
+import threading
 import warnings
 from argparse import Namespace
 from collections import Counter, deque, defaultdict
@@ -102,6 +103,12 @@ class MultiWorld():
     per_slot_randoms: Utils.DeprecateDict[int, random.Random]
     """Deprecated. Please use `self.random` instead."""
 
+    sphere_index: Optional[SphereIndex]
+    """Set after fill to share sphere calculations between output steps, see get_sphere_index."""
+    placement_version: int
+    """Incremented whenever items are placed, moved or reclassified, which makes sphere_index outdated.
+    Code that sets Location.item or Item.classification directly after fill has to increment it too."""
+
     class AttributeProxy():
         def __init__(self, rule):
             self.rule = rule
@@ -166,6 +173,8 @@ class MultiWorld():
         self.early_items = {player: {} for player in self.player_ids}
         self.local_early_items = {player: {} for player in self.player_ids}
         self.indirect_connections = {}
+        self.sphere_index = None
+        self.placement_version = 0
         self.start_inventory_from_pool: Dict[int, Options.StartInventoryPool] = {}
         self.plando_item_blocks = {}
 
@@ -338,6 +347,7 @@ class MultiWorld():
                     new_item = group["world"].create_item(item_name)
                     # mangle together all original classification bits
                     new_item.classification |= classifications[item_name]
+                    self.placement_version += 1
                     new_itempool.append(new_item)
 
             region = Region(group["world"].origin_region_name, group_id, self, "ItemLink")
@@ -497,6 +507,7 @@ class MultiWorld():
     def push_item(self, location: Location, item: Item, collect: bool = True):
         location.item = item
         item.location = location
+        self.placement_version += 1
         if collect:
             self.state.collect(item, location.advancement, location)
 
@@ -581,6 +592,13 @@ class MultiWorld():
 
         return False
 
+    def get_sphere_index(self) -> Optional[SphereIndex]:
+        """Returns sphere_index if it is set and no items were placed, moved or reclassified since it was created."""
+        sphere_index = self.sphere_index
+        if sphere_index and not sphere_index.is_current():
+            self.sphere_index = sphere_index = None
+        return sphere_index
+
     def get_spheres(self) -> Iterator[Set[Location]]:
         """
         yields a set of locations for each logical sphere
@@ -589,6 +607,12 @@ class MultiWorld():
         locations is followed by an empty set, and then a set of all of the
         unreachable locations.
         """
+        sphere_index = self.get_sphere_index()
+        if sphere_index:
+            return sphere_index.get_spheres()
+        return self._get_spheres()
+
+    def _get_spheres(self) -> Iterator[Set[Location]]:
         state = CollectionState(self)
         locations = set(self.get_filled_locations())
 
@@ -615,6 +639,12 @@ class MultiWorld():
         If there are unreachable locations, the last sphere of reachable locations is followed by an empty set,
         and then a set of all of the unreachable locations.
         """
+        sphere_index = self.get_sphere_index()
+        if sphere_index:
+            return sphere_index.get_sendable_spheres()
+        return self._get_sendable_spheres()
+
+    def _get_sendable_spheres(self) -> Iterator[Set[Location]]:
         state = CollectionState(self)
         locations: Set[Location] = set()
         events: Set[Location] = set()
@@ -653,7 +683,9 @@ class MultiWorld():
 
     def fulfills_accessibility(self, state: Optional[CollectionState] = None):
         """Check if accessibility rules are fulfilled with current or supplied state."""
+        sphere_index = None
         if not state:
+            sphere_index = self.get_sphere_index()
             state = CollectionState(self)
         players: Dict[str, Set[int]] = {
             "minimal": set(),
@@ -684,6 +716,15 @@ class MultiWorld():
 
         locations = [location for location in self.get_locations() if location_relevant(location)]
 
+        if sphere_index:
+            # Collecting only the progression of the shared spheres reaches less than the check below, so if that is
+            # already enough, the check can be skipped.
+            sphere_states = sphere_index.get_progression_spheres()[1]
+            final_state = sphere_states[-1].copy() if sphere_states else state
+            if self.has_beaten_game(final_state) and all(location.can_reach(final_state) for location in locations
+                                                         if location_condition(location)):
+                return True
+
         while locations:
             sphere: List[Location] = []
             for n in range(len(locations) - 1, -1, -1):
@@ -715,9 +756,543 @@ class MultiWorld():
         return False
 
 
+class SphereIndex:
+    """
+    Logical spheres of a MultiWorld's item placements, each kind calculated once on first use.
+    After fill, it is set as MultiWorld.sphere_index to share the spheres between the multidata, the accessibility
+    check, the spoiler playthrough and worlds' output. It is dropped once items are placed, moved or reclassified.
+    """
+    multiworld: MultiWorld
+    _version: int
+    _lock: threading.Lock
+    _spheres: Optional[List[Set[Location]]]
+    _sendable_spheres: Optional[List[Set[Location]]]
+    _progression_spheres: Optional[Tuple[List[Set[Location]], List[CollectionState], Set[Location]]]
+
+    def __init__(self, multiworld: MultiWorld) -> None:
+        self.multiworld = multiworld
+        self._version = multiworld.placement_version
+        # output steps run in threads, which should wait for a calculation another one started
+        self._lock = threading.Lock()
+        self._spheres = None
+        self._sendable_spheres = None
+        self._progression_spheres = None
+
+    def is_current(self) -> bool:
+        """Returns True if no items were placed, moved or reclassified since this was created."""
+        return self.multiworld.placement_version == self._version
+
+    def get_spheres(self) -> Iterator[Set[Location]]:
+        """Yields a copy of each set of locations yielded by MultiWorld.get_spheres."""
+        with self._lock:
+            if self._spheres is None:
+                self._spheres = list(self.multiworld._get_spheres())
+        return (sphere.copy() for sphere in self._spheres)
+
+    def get_sendable_spheres(self) -> Iterator[Set[Location]]:
+        """Yields a copy of each set of locations yielded by MultiWorld.get_sendable_spheres."""
+        with self._lock:
+            if self._sendable_spheres is None:
+                self._sendable_spheres = list(self.multiworld._get_sendable_spheres())
+        return (sphere.copy() for sphere in self._sendable_spheres)
+
+    def get_progression_spheres(self) -> Tuple[List[Set[Location]], List[CollectionState], Set[Location]]:
+        """
+        Returns the spheres of locations containing progression, collecting only progression items,
+        a state with the items of all spheres up to and including each sphere,
+        and the progression locations that could not be reached.
+        These are shared, so they must not be modified. As querying a state updates its reachable regions,
+        the states are only to be copied, which leaves them untouched and can be done from any thread.
+        """
+        with self._lock:
+            if self._progression_spheres is None:
+                self._progression_spheres = self._calculate_progression_spheres()
+            return self._progression_spheres
+
+    def _calculate_progression_spheres(self) -> Tuple[List[Set[Location]], List[CollectionState], Set[Location]]:
+        multiworld = self.multiworld
+        prog_locations = {location for location in multiworld.get_filled_locations() if location.item.advancement}
+        collection_spheres: List[Set[Location]] = []
+        sphere_states: List[CollectionState] = []
+        state = CollectionState(multiworld)
+        sphere_candidates = set(prog_locations)
+        logging.debug('Building up collection spheres.')
+        while sphere_candidates:
+
+            # build up spheres of collection radius.
+            # Everything in each sphere is independent from each other in dependencies and only depends on lower spheres
+
+            sphere = {location for location in sphere_candidates if state.can_reach(location)}
+
+            for location in sphere:
+                state.collect(location.item, True, location)
+
+            sphere_candidates -= sphere
+            collection_spheres.append(sphere)
+            sphere_states.append(state.copy())
+
+            logging.debug('Calculated sphere %i, containing %i of %i progress items.', len(collection_spheres),
+                          len(sphere),
+                          len(prog_locations))
+            if not sphere:
+                logging.debug('The following items could not be reached: %s', ['%s (Player %d) at %s (Player %d)' % (
+                    location.item.name, location.item.player, location.name, location.player) for location in
+                                                                               sphere_candidates])
+                break
+        return collection_spheres, sphere_states, sphere_candidates
+
+
 PathValue = Tuple[str, Optional["PathValue"]]
 
 
+class CopyOnWriteDict(dict):
+    """
+    A dict whose values are shared with its copies until they are looked up.
+
+    copy() moves the values this dict looked up into a new shared layer without copying them, and both this dict and the
+    copy make a private copy of a shared value the first time they look it up, so values that are never touched again
+    are never copied. As copy() moves the values of the dict it is called on, references to values looked up before a
+    copy() must not be used to modify them afterwards, and neither copy() nor lookups may run concurrently with anything
+    else on the same dict.
+    CollectionState uses this for its per-player data. A LogicMixin can do the same by creating its per-player dict as
+    CopyOnWriteDict in init_mixin and setting `new_state.<attribute> = self.<attribute>.copy()` in copy_mixin.
+    """
+    __slots__ = ("_shared", "_copy_value")
+
+    _shared: Dict[Any, Any]
+    """values not yet looked up since this dict was copied, shared with other dicts and never modified. Disjoint from
+    the own keys."""
+    _copy_value: Optional[Callable[[Any], Any]]
+    """makes a private copy of a shared value, calls value.copy() if None"""
+
+    def __init__(self, *args: Any, copy_value: Optional[Callable[[Any], Any]] = None, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self._shared = {}
+        self._copy_value = copy_value
+
+    def __missing__(self, key: Any) -> Any:
+        value = self._shared.pop(key)
+        value = value.copy() if self._copy_value is None else self._copy_value(value)
+        dict.__setitem__(self, key, value)
+        return value
+
+    def _unshare(self) -> None:
+        for key in tuple(self._shared):
+            self.__missing__(key)
+
+    def copy(self) -> CopyOnWriteDict:
+        ret = self.__class__(copy_value=self._copy_value)
+        if dict.__len__(self):
+            self._shared = {**self._shared, **dict.copy(self)}
+            dict.clear(self)
+        ret._shared = self._shared.copy()
+        return ret
+
+    def __setitem__(self, key: Any, value: Any) -> None:
+        self._shared.pop(key, None)
+        super().__setitem__(key, value)
+
+    def __delitem__(self, key: Any) -> None:
+        if key in self._shared:
+            del self._shared[key]
+        else:
+            super().__delitem__(key)
+
+    def __contains__(self, key: object) -> bool:
+        return super().__contains__(key) or key in self._shared
+
+    def __len__(self) -> int:
+        return super().__len__() + len(self._shared)
+
+    def __iter__(self) -> Iterator[Any]:
+        yield from super().__iter__()
+        yield from tuple(self._shared)
+
+    def __eq__(self, other: object) -> bool:
+        self._unshare()
+        return super().__eq__(other)
+
+    def __ne__(self, other: object) -> bool:
+        return not self == other
+
+    __hash__ = None  # type: ignore[assignment]
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({ {**self._shared, **dict.copy(self)} !r})"
+
+    def keys(self) -> Any:
+        self._unshare()
+        return super().keys()
+
+    def values(self) -> Any:
+        self._unshare()
+        return super().values()
+
+    def items(self) -> Any:
+        self._unshare()
+        return super().items()
+
+    def get(self, key: Any, default: Any = None) -> Any:
+        return self[key] if key in self else default
+
+    def pop(self, key: Any, *default: Any) -> Any:
+        if key in self._shared:
+            self.__missing__(key)
+        return super().pop(key, *default)
+
+    def popitem(self) -> Tuple[Any, Any]:
+        self._unshare()
+        return super().popitem()
+
+    def setdefault(self, key: Any, default: Any = None) -> Any:
+        if key not in self:
+            self[key] = default
+        return self[key]
+
+    def update(self, *args: Any, **kwargs: Any) -> None:
+        for key, value in dict(*args, **kwargs).items():
+            self[key] = value
+
+    def clear(self) -> None:
+        self._shared.clear()
+        super().clear()
+
+
+class _TrackedCounter(Counter):
+    """Counter of a player's items that versions each modification, for rule dependency tracking."""
+    version: int
+    """incremented on every modification"""
+    item_versions: Dict[str, int]
+    """version of the last modification of each item name, ordered by version"""
+
+    def __init__(self, iterable=None, /, **kwds) -> None:
+        self.version = 0
+        self.item_versions = {}
+        super().__init__(iterable, **kwds)
+
+    def _modified(self, item: str) -> None:
+        self.version += 1
+        self.item_versions.pop(item, None)
+        self.item_versions[item] = self.version
+
+    def changed_since(self, version: int) -> List[str]:
+        """Return the item names that were modified after `version`."""
+        changed: List[str] = []
+        for item, item_version in reversed(self.item_versions.items()):
+            if item_version <= version:
+                break
+            changed.append(item)
+        return changed
+
+    def __setitem__(self, item: str, count: int) -> None:
+        self._modified(item)
+        super().__setitem__(item, count)
+
+    def __delitem__(self, item: str) -> None:
+        self._modified(item)
+        super().__delitem__(item)
+
+    def update(self, iterable=None, /, **kwds) -> None:
+        # Counter.update bypasses __setitem__ when the Counter is empty
+        counts = Counter(iterable, **kwds)
+        for item in counts:
+            self._modified(item)
+        super().update(counts)
+
+    def pop(self, item: str, *default: Any) -> Any:
+        self._modified(item)
+        return super().pop(item, *default)
+
+    def clear(self) -> None:
+        for item in self:
+            self._modified(item)
+        super().clear()
+
+    def copy(self) -> _TrackedCounter:
+        ret = self.__class__()
+        dict.update(ret, self)
+        ret.version = self.version
+        ret.item_versions = self.item_versions.copy()
+        return ret
+
+
+class _RuleDependencyRecorder:
+    """Records which items and regions of one player are read while evaluating an access rule."""
+    __slots__ = ("player", "ignored_region", "items", "regions", "untracked")
+
+    player: int
+    ignored_region: Optional[Region]
+    items: Set[str]
+    regions: Set[Region]
+    untracked: bool
+    """set if anything was read that can't be attributed to a specific item or region of `player`"""
+
+    def __init__(self, player: int, ignored_region: Optional[Region] = None) -> None:
+        self.player = player
+        self.ignored_region = ignored_region
+        self.items = set()
+        self.regions = set()
+        self.untracked = False
+
+
+class _RecordingState:
+    """
+    Passed to access rules in place of a CollectionState, recording the reads of `recorder.player`'s items and regions
+    made through the item and region methods. Anything else, including direct reads of the state's attributes and
+    world logic methods, is forwarded to the state and flags the recorder as untracked.
+    """
+    __slots__ = ("state", "recorder")
+
+    state: CollectionState
+    recorder: _RuleDependencyRecorder
+
+    def __init__(self, state: CollectionState, recorder: _RuleDependencyRecorder) -> None:
+        self.state = state
+        self.recorder = recorder
+
+    def __getattr__(self, name: str) -> Any:
+        self.recorder.untracked = True
+        return getattr(self.state, name)
+
+    @property
+    def multiworld(self) -> MultiWorld:
+        return self.state.multiworld
+
+    def _record_item(self, item: str, player: int) -> None:
+        if player == self.recorder.player:
+            self.recorder.items.add(item)
+        else:
+            # other players' state is not tracked, as it changes without making this player stale
+            self.recorder.untracked = True
+
+    def _record_items(self, items: Iterable[str], player: int) -> Iterable[str]:
+        if player == self.recorder.player:
+            # the items may be an iterator, so they are materialized before being recorded and passed on
+            items = tuple(items)
+            self.recorder.items.update(items)
+        else:
+            self.recorder.untracked = True
+        return items
+
+    def _record_group(self, item_name_group: str, player: int) -> None:
+        self._record_items(self.state.multiworld.worlds[player].item_name_groups[item_name_group], player)
+
+    def _record_region(self, region: Region) -> None:
+        if region.player != self.recorder.player:
+            self.recorder.untracked = True
+        elif region is not self.recorder.ignored_region:
+            self.recorder.regions.add(region)
+
+    def can_reach(self, spot: Union[Location, Entrance, Region, str], resolution_hint: Optional[str] = None,
+                  player: Optional[int] = None) -> bool:
+        if isinstance(spot, Region):
+            self._record_region(spot)
+            return spot.can_reach(self.state)
+        if isinstance(spot, str) and resolution_hint not in ("Location", "Entrance"):
+            assert isinstance(player, int), "can_reach: player is required if spot is str"
+            return self.can_reach_region(spot, player)
+        self.recorder.untracked = True
+        return self.state.can_reach(spot, resolution_hint, player)
+
+    def can_reach_region(self, spot: str, player: int) -> bool:
+        region = self.state.multiworld.get_region(spot, player)
+        self._record_region(region)
+        return region.can_reach(self.state)
+
+    def has(self, item: str, player: int, count: int = 1) -> bool:
+        self._record_item(item, player)
+        return self.state.has(item, player, count)
+
+    def count(self, item: str, player: int) -> int:
+        self._record_item(item, player)
+        return self.state.count(item, player)
+
+    def has_all(self, items: Iterable[str], player: int) -> bool:
+        return self.state.has_all(self._record_items(items, player), player)
+
+    def has_any(self, items: Iterable[str], player: int) -> bool:
+        return self.state.has_any(self._record_items(items, player), player)
+
+    def has_all_counts(self, item_counts: Mapping[str, int], player: int) -> bool:
+        self._record_items(item_counts, player)
+        return self.state.has_all_counts(item_counts, player)
+
+    def has_any_count(self, item_counts: Mapping[str, int], player: int) -> bool:
+        self._record_items(item_counts, player)
+        return self.state.has_any_count(item_counts, player)
+
+    def has_from_list(self, items: Iterable[str], player: int, count: int) -> bool:
+        return self.state.has_from_list(self._record_items(items, player), player, count)
+
+    def has_from_list_unique(self, items: Iterable[str], player: int, count: int) -> bool:
+        return self.state.has_from_list_unique(self._record_items(items, player), player, count)
+
+    def count_from_list(self, items: Iterable[str], player: int) -> int:
+        return self.state.count_from_list(self._record_items(items, player), player)
+
+    def count_from_list_unique(self, items: Iterable[str], player: int) -> int:
+        return self.state.count_from_list_unique(self._record_items(items, player), player)
+
+    def has_group(self, item_name_group: str, player: int, count: int = 1) -> bool:
+        self._record_group(item_name_group, player)
+        return self.state.has_group(item_name_group, player, count)
+
+    def has_group_unique(self, item_name_group: str, player: int, count: int = 1) -> bool:
+        self._record_group(item_name_group, player)
+        return self.state.has_group_unique(item_name_group, player, count)
+
+    def count_group(self, item_name_group: str, player: int) -> int:
+        self._record_group(item_name_group, player)
+        return self.state.count_group(item_name_group, player)
+
+    def count_group_unique(self, item_name_group: str, player: int) -> int:
+        self._record_group(item_name_group, player)
+        return self.state.count_group_unique(item_name_group, player)
+
+
+class _ReachabilityDependencies:
+    """A player's blocked entrances, indexed by what their access rules read when they were last evaluated."""
+    __slots__ = ("item_dependents", "region_dependents", "untracked", "version", "reached_regions")
+
+    item_dependents: Dict[str, Set[Entrance]]
+    region_dependents: Dict[Region, Set[Entrance]]
+    untracked: Set[Entrance]
+    """entrances that have to be rechecked on every update, as their dependencies are unknown"""
+    version: int
+    """version of the player's items at the last update"""
+    reached_regions: List[Region]
+    """the player's reachable regions, in the order they were reached"""
+
+    def __init__(self) -> None:
+        self.item_dependents = {}
+        self.region_dependents = {}
+        self.untracked = set()
+        self.version = 0
+        self.reached_regions = []
+
+    def copy(self) -> _ReachabilityDependencies:
+        ret = _ReachabilityDependencies()
+        ret.item_dependents = {item: entrances.copy() for item, entrances in self.item_dependents.items()}
+        ret.region_dependents = {region: entrances.copy() for region, entrances in self.region_dependents.items()}
+        ret.untracked = self.untracked.copy()
+        ret.version = self.version
+        ret.reached_regions = self.reached_regions.copy()
+        return ret
+
+    def clear(self) -> None:
+        self.item_dependents.clear()
+        self.region_dependents.clear()
+        self.untracked.clear()
+        self.reached_regions.clear()
+
+    def record(self, entrance: Entrance, recorder: _RuleDependencyRecorder) -> None:
+        """Index a blocked entrance by the reads of its failed access check."""
+        # entries from older checks are left behind and filtered against blocked_connections once they are popped
+        if recorder.untracked:
+            self.untracked.add(entrance)
+            return
+        self.untracked.discard(entrance)
+        for item in recorder.items:
+            self.item_dependents.setdefault(item, set()).add(entrance)
+        for region in recorder.regions:
+            self.region_dependents.setdefault(region, set()).add(entrance)
+
+    def pop_recheck_candidates(self, prog_items: Counter[str], blocked_connections: Set[Entrance]) -> Set[Entrance]:
+        """Return the blocked entrances that may have become passable since the last update."""
+        if not isinstance(prog_items, _TrackedCounter):
+            # items were replaced without tracking, so everything has to be rechecked
+            self.clear()
+            return set(blocked_connections)
+        self.untracked &= blocked_connections
+        candidates = set(self.untracked)
+        for item in prog_items.changed_since(self.version):
+            candidates |= self.item_dependents.pop(item, set())
+        self.version = prog_items.version
+        return candidates & blocked_connections
+
+
+class _LocationDependencyIndex:
+    """
+    A player's pending locations during a sweep, indexed by what their access rules read when they were last
+    evaluated, so that only the locations whose items or regions changed are checked again.
+    """
+    __slots__ = ("player", "order", "unchecked", "item_dependents", "region_dependents", "untracked", "version",
+                 "region_count")
+
+    player: int
+    order: Dict[Location, int]
+    """pending locations, mapped to their position in the original sweep order"""
+    unchecked: Set[Location]
+    """pending locations that have yet to be checked, or have to be checked again regardless of what changed"""
+    item_dependents: Dict[str, Set[Location]]
+    region_dependents: Dict[Region, Set[Location]]
+    untracked: Set[Location]
+    """locations that have to be checked on every sweep, as their dependencies are unknown"""
+    version: int
+    """version of the player's items at the last sweep"""
+    region_count: int
+    """number of the player's reached regions at the last sweep"""
+
+    def __init__(self, player: int, locations: Iterable[Location]) -> None:
+        self.player = player
+        self.order = {location: index for index, location in enumerate(locations)}
+        self.unchecked = set(self.order)
+        self.item_dependents = {}
+        self.region_dependents = {}
+        self.untracked = set()
+        self.version = 0
+        self.region_count = 0
+
+    def _reset(self) -> None:
+        self.unchecked = set(self.order)
+        self.item_dependents.clear()
+        self.region_dependents.clear()
+        self.untracked.clear()
+
+    def sweep(self, state: CollectionState) -> List[Location]:
+        """Return the pending locations that are reachable now, removing them from the index."""
+        player = self.player
+        if state.stale[player]:
+            # update the region cache up front, so that it isn't updated in the middle of recording a rule
+            state.update_reachable_regions(player)
+        prog_items = state.prog_items[player]
+        reached_regions = state._reachability_dependencies[player].reached_regions
+        if not isinstance(prog_items, _TrackedCounter) or len(reached_regions) < self.region_count:
+            # the state was changed in ways that can't be followed, so everything has to be checked again
+            self._reset()
+        else:
+            for item in prog_items.changed_since(self.version):
+                self.unchecked |= self.item_dependents.pop(item, set())
+            for region in reached_regions[self.region_count:]:
+                self.unchecked |= self.region_dependents.pop(region, set())
+        self.version = getattr(prog_items, "version", 0)
+        self.region_count = len(reached_regions)
+
+        candidates = self.unchecked | self.untracked
+        self.unchecked = set()
+        reachable: List[Location] = []
+        # check in the original order, so that items are collected in the same order as without the index
+        for location in sorted(candidates & self.order.keys(), key=self.order.__getitem__):
+            recorder = _RuleDependencyRecorder(player)
+            if state._can_reach_recorded(location, recorder):
+                del self.order[location]
+                self.untracked.discard(location)
+                reachable.append(location)
+            elif recorder.untracked:
+                self.untracked.add(location)
+            else:
+                # entries from older checks are left behind and filtered against the pending locations
+                self.untracked.discard(location)
+                for item in recorder.items:
+                    self.item_dependents.setdefault(item, set()).add(location)
+                for region in recorder.regions:
+                    self.region_dependents.setdefault(region, set()).add(location)
+        return reachable
+
+    def __len__(self) -> int:
+        return len(self.order)
+
+
 class CollectionState():
     prog_items: Dict[int, Counter[str]]
     multiworld: MultiWorld
@@ -728,15 +1303,21 @@ class CollectionState():
     locations_checked: Set[Location]
     stale: Dict[int, bool]
     allow_partial_entrances: bool
+    _reachability_dependencies: Dict[int, _ReachabilityDependencies]
+    """only present for players whose world has rule_dependency_tracking enabled"""
     additional_init_functions: List[Callable[[CollectionState, MultiWorld], None]] = []
     additional_copy_functions: List[Callable[[CollectionState, CollectionState], CollectionState]] = []
 
     def __init__(self, parent: MultiWorld, allow_partial_entrances: bool = False):
         assert parent.worlds, "CollectionState created without worlds initialized in parent"
-        self.prog_items = {player: Counter() for player in parent.get_all_ids()}
+        self._reachability_dependencies = CopyOnWriteDict(
+            {player: _ReachabilityDependencies() for player in parent.get_all_ids()
+             if getattr(parent.worlds.get(player), "rule_dependency_tracking", False)})
+        self.prog_items = CopyOnWriteDict({player: _TrackedCounter() if player in self._reachability_dependencies
+                                           else Counter() for player in parent.get_all_ids()})
         self.multiworld = parent
-        self.reachable_regions = {player: set() for player in parent.get_all_ids()}
-        self.blocked_connections = {player: set() for player in parent.get_all_ids()}
+        self.reachable_regions = CopyOnWriteDict({player: set() for player in parent.get_all_ids()})
+        self.blocked_connections = CopyOnWriteDict({player: set() for player in parent.get_all_ids()})
         self.advancements = set()
         self.path = {}
         self.locations_checked = set()
@@ -752,16 +1333,25 @@ class CollectionState():
         self.stale[player] = False
         world: AutoWorld.World = self.multiworld.worlds[player]
         reachable_regions = self.reachable_regions[player]
-        queue = deque(self.blocked_connections[player])
+        dependencies = self._reachability_dependencies.get(player, None)
+        if dependencies is None:
+            queue = deque(self.blocked_connections[player])
+        else:
+            queue = deque(dependencies.pop_recheck_candidates(self.prog_items[player],
+                                                              self.blocked_connections[player]))
         start: Region = world.get_region(world.origin_region_name)
 
         # init on first call - this can't be done on construction since the regions don't exist yet
         if start not in reachable_regions:
             reachable_regions.add(start)
+            if dependencies is not None:
+                dependencies.reached_regions.append(start)
             self.blocked_connections[player].update(start.exits)
             queue.extend(start.exits)
 
-        if world.explicit_indirect_conditions:
+        if dependencies is not None:
+            self._update_reachable_regions_tracked_dependencies(player, queue)
+        elif world.explicit_indirect_conditions:
             self._update_reachable_regions_explicit_indirect_conditions(player, queue)
         else:
             self._update_reachable_regions_auto_indirect_conditions(player, queue)
@@ -815,17 +1405,79 @@ class CollectionState():
             # sweep for indirect connections, mostly Entrance.can_reach(unrelated_Region)
             queue.extend(blocked_connections)
 
+    def _update_reachable_regions_tracked_dependencies(self, player: int, queue: deque):
+        reachable_regions = self.reachable_regions[player]
+        blocked_connections = self.blocked_connections[player]
+        dependencies = self._reachability_dependencies[player]
+        new_connection: bool = True
+        # run BFS on the connections that may have changed, indexing those blocked by what their rules read
+        while new_connection:
+            new_connection = False
+            while queue:
+                connection = queue.popleft()
+                if connection not in blocked_connections:
+                    # queued more than once
+                    continue
+                new_region = connection.connected_region
+                if new_region in reachable_regions:
+                    blocked_connections.remove(connection)
+                    continue
+                reachable = self._can_reach_recording_dependencies(player, connection)
+                if reachable:
+                    if self.allow_partial_entrances and not new_region:
+                        continue
+                    assert new_region, f"tried to search through an Entrance \"{connection}\" with no connected Region"
+                    reachable_regions.add(new_region)
+                    blocked_connections.remove(connection)
+                    blocked_connections.update(new_region.exits)
+                    queue.extend(new_region.exits)
+                    self.path[new_region] = (new_region.name, self.path.get(connection, None))
+                    dependencies.reached_regions.append(new_region)
+                    # Retry connections whose rules checked the new region
+                    queue.extend(dependencies.region_dependents.pop(new_region, ()))
+                    new_connection = True
+            if new_connection:
+                # connections with untracked reads could depend on any region
+                queue.extend(dependencies.untracked & blocked_connections)
+
+    def _can_reach_recording_dependencies(self, player: int, connection: Entrance) -> bool:
+        recorder = _RuleDependencyRecorder(player, connection.parent_region)
+        reachable = self._can_reach_recorded(connection, recorder)
+        if not reachable:
+            self._reachability_dependencies[player].record(connection, recorder)
+        return reachable
+
+    def _can_reach_recorded(self, spot: Union[Location, Entrance], recorder: _RuleDependencyRecorder) -> bool:
+        """Check if `spot` can be reached, recording the reads of `recorder.player`'s items and regions."""
+        if type(spot).can_reach not in (Location.can_reach, Entrance.can_reach):
+            # a custom can_reach may read anything, so it is evaluated as is
+            recorder.untracked = True
+            return spot.can_reach(self)
+        assert spot.parent_region, f"called can_reach on \"{spot}\" with no parent_region"
+        recording_state = _RecordingState(self, recorder)
+        recording_state._record_region(spot.parent_region)
+        if not spot.parent_region.can_reach(self) or not spot.access_rule(recording_state):  # type: ignore[arg-type]
+            return False
+        if isinstance(spot, Entrance) and not spot.hide_path and spot not in self.path:
+            # same as Entrance.can_reach
+            self.path[spot] = (spot.name, self.path.get(spot.parent_region, (spot.parent_region.name, None)))
+        return True
+
     def copy(self) -> CollectionState:
-        ret = CollectionState(self.multiworld)
-        ret.prog_items = {player: counter.copy() for player, counter in self.prog_items.items()}
-        ret.reachable_regions = {player: region_set.copy() for player, region_set in
-                                 self.reachable_regions.items()}
-        ret.blocked_connections = {player: entrance_set.copy() for player, entrance_set in
-                                   self.blocked_connections.items()}
+        # per-player data is only copied once either state looks it up, so the constructor is skipped
+        ret = CollectionState.__new__(CollectionState)
+        ret.multiworld = self.multiworld
+        ret.prog_items = self.prog_items.copy()
+        ret.reachable_regions = self.reachable_regions.copy()
+        ret.blocked_connections = self.blocked_connections.copy()
         ret.advancements = self.advancements.copy()
         ret.path = self.path.copy()
         ret.locations_checked = self.locations_checked.copy()
+        ret.stale = {player: True for player in self.stale}
         ret.allow_partial_entrances = self.allow_partial_entrances
+        ret._reachability_dependencies = self._reachability_dependencies.copy()
+        for function in self.additional_init_functions:
+            function(ret, self.multiworld)
         for function in self.additional_copy_functions:
             ret = function(self, ret)
         return ret
@@ -868,34 +1520,45 @@ class CollectionState():
         """
         all_players = {player for player, _ in advancements_per_player}
         players_to_check = all_players
+        # Players with rule dependency tracking only check the locations whose recorded items or regions changed.
+        pending_per_player: List[Tuple[int, Union[List[Location], _LocationDependencyIndex]]] = [
+            (player, _LocationDependencyIndex(player, locations) if player in self._reachability_dependencies
+             else locations)
+            for player, locations in advancements_per_player]
         # As an optimization, it is assumed that each player's world only logically depends on itself. However, worlds
         # are allowed to logically depend on other worlds, so once there are no more players that should be checked
         # under this assumption, an extra sweep iteration is performed that checks every player, to confirm that the
         # sweep is finished.
         checking_if_finished = False
         while players_to_check:
-            next_advancements_per_player: List[Tuple[int, List[Location]]] = []
+            next_pending_per_player: List[Tuple[int, Union[List[Location], _LocationDependencyIndex]]] = []
             next_players_to_check = set()
 
-            for player, locations in advancements_per_player:
+            for player, locations in pending_per_player:
                 if player not in players_to_check:
-                    next_advancements_per_player.append((player, locations))
+                    next_pending_per_player.append((player, locations))
                     continue
 
                 # Accessibility of each location is checked first because a player's region accessibility cache becomes
                 # stale whenever one of their own items is collected into the state.
-                reachable_locations: List[Location] = []
-                unreachable_locations: List[Location] = []
-                for location in locations:
-                    if location.can_reach(self):
-                        # Locations containing items that do not belong to `player` could be collected immediately
-                        # because they won't stale `player`'s region accessibility cache, but, for simplicity, all the
-                        # items at reachable locations are collected in a single loop.
-                        reachable_locations.append(location)
-                    else:
-                        unreachable_locations.append(location)
-                if unreachable_locations:
-                    next_advancements_per_player.append((player, unreachable_locations))
+                reachable_locations: List[Location]
+                if isinstance(locations, _LocationDependencyIndex):
+                    reachable_locations = locations.sweep(self)
+                    if locations:
+                        next_pending_per_player.append((player, locations))
+                else:
+                    reachable_locations = []
+                    unreachable_locations: List[Location] = []
+                    for location in locations:
+                        if location.can_reach(self):
+                            # Locations containing items that do not belong to `player` could be collected immediately
+                            # because they won't stale `player`'s region accessibility cache, but, for simplicity, all
+                            # the items at reachable locations are collected in a single loop.
+                            reachable_locations.append(location)
+                        else:
+                            unreachable_locations.append(location)
+                    if unreachable_locations:
+                        next_pending_per_player.append((player, unreachable_locations))
 
                 # A previous player's locations processed in the current `while players_to_check` iteration could have
                 # collected items belonging to `player`, but now that all of `player`'s reachable locations have been
@@ -928,7 +1591,7 @@ class CollectionState():
                 checking_if_finished = False
 
             players_to_check = next_players_to_check
-            advancements_per_player = next_advancements_per_player
+            pending_per_player = next_pending_per_player
 
             if yield_each_sweep:
                 yield
@@ -1139,6 +1802,8 @@ class CollectionState():
             # invalidate caches, nothing can be trusted anymore now
             self.reachable_regions[item.player] = set()
             self.blocked_connections[item.player] = set()
+            if item.player in self._reachability_dependencies:
+                self._reachability_dependencies[item.player].clear()
             self.stale[item.player] = True
 
     def remove_item(self, item: str, player: int, count: int = 1) -> None:
@@ -1505,6 +2170,8 @@ class Location:
         self.item = item
         item.location = self
         self.locked = True
+        if self.parent_region and self.parent_region.multiworld:
+            self.parent_region.multiworld.placement_version += 1
 
     def __repr__(self):
         multiworld = self.parent_region.multiworld if self.parent_region and self.parent_region.multiworld else None
@@ -1692,61 +2359,91 @@ class Spoiler:
     def create_playthrough(self, create_paths: bool = True) -> None:
         """Destructive to the multiworld while it is run, damage gets repaired afterwards."""
         from itertools import chain
-        # get locations containing progress items
         multiworld = self.multiworld
-        prog_locations = {location for location in multiworld.get_filled_locations() if location.item.advancement}
-        state_cache: List[Optional[CollectionState]] = [None]
-        collection_spheres: List[Set[Location]] = []
-        state = CollectionState(multiworld)
-        sphere_candidates = set(prog_locations)
-        logging.debug('Building up collection spheres.')
-        while sphere_candidates:
-
-            # build up spheres of collection radius.
-            # Everything in each sphere is independent from each other in dependencies and only depends on lower spheres
-
-            sphere = {location for location in sphere_candidates if state.can_reach(location)}
-
-            for location in sphere:
-                state.collect(location.item, True, location)
-
-            sphere_candidates -= sphere
-            collection_spheres.append(sphere)
-            state_cache.append(state.copy())
-
-            logging.debug('Calculated sphere %i, containing %i of %i progress items.', len(collection_spheres),
-                          len(sphere),
-                          len(prog_locations))
-            if not sphere:
-                logging.debug('The following items could not be reached: %s', ['%s (Player %d) at %s (Player %d)' % (
-                    location.item.name, location.item.player, location.name, location.player) for location in
-                                                                               sphere_candidates])
-                if not multiworld.has_beaten_game(state):
-                    raise RuntimeError("During playthrough generation, the game was determined to be unbeatable. "
-                                       "Something went terribly wrong here. "
-                                       f"Unreachable progression items: {sphere_candidates}")
-                else:
-                    self.unreachables = sphere_candidates
-                    break
+        # get the spheres of locations containing progress items
+        sphere_index = multiworld.get_sphere_index() or SphereIndex(multiworld)
+        progression_spheres, sphere_states, sphere_candidates = sphere_index.get_progression_spheres()
+        # the spheres are culled and the states queried below, so they are copied from the shared index
+        collection_spheres = [sphere.copy() for sphere in progression_spheres]
+        state_cache: List[Optional[CollectionState]] = [None, *(state.copy() for state in sphere_states)]
+        if sphere_candidates:
+            if not multiworld.has_beaten_game(state_cache[-1]):
+                raise RuntimeError("During playthrough generation, the game was determined to be unbeatable. "
+                                   "Something went terribly wrong here. "
+                                   f"Unreachable progression items: {sphere_candidates}")
+            else:
+                self.unreachables = set(sphere_candidates)
 
         # in the second phase, we cull each sphere such that the game is still beatable,
-        # reducing each range of influence to the bare minimum required inside it
+        # reducing each range of influence to the bare minimum required inside it.
+        # If the game is beatable without a group of locations, it is also beatable without each of them, so checking a
+        # group at once removes the same locations as checking them one after another, with a single sweep.
         required_locations = {location for sphere in collection_spheres for location in sphere}
+        # counts of checked locations so far, to size the groups by
+        kept_count = removed_count = 1
+
+        def can_beat_game(num: int) -> bool:
+            """
+            Same as multiworld.can_beat_game(state_cache[num], required_locations), but the required locations are
+            collected sphere by sphere first, so the ones still reachable in their own sphere are only checked once.
+            """
+            state = state_cache[num]
+            state = state.copy() if state else CollectionState(multiworld)
+            unreachable: List[Location] = []
+            for sphere in collection_spheres[num:]:
+                if multiworld.has_beaten_game(state):
+                    return True
+                reachable: List[Location] = []
+                unreachable_before = unreachable
+                unreachable = []
+                for location in chain(unreachable_before, sphere):
+                    if location in required_locations:
+                        (reachable if location.can_reach(state) else unreachable).append(location)
+                for location in reachable:
+                    state.collect(location.item, True, location)
+            return multiworld.can_beat_game(state, unreachable)
+
+        def cull(group: List[Location], num: int, required_items: Set[Item], known_required: bool = False) -> None:
+            """
+            Removes the locations of the group from required_locations that the game can be beaten without.
+
+            :param known_required: the game is known to not be beatable without the group
+            """
+            if len(group) == 1 and group[0].item in required_items:
+                # a copy of the item, from the same sphere, was required, so collecting that copy can't replace this one
+                return
+            if not known_required:
+                # we remove the group from required_locations to sweep from, and check if the game is still beatable
+                logging.debug('Checking if %i items starting with %s (Player %d) are required to beat the game.',
+                              len(group), group[0].item.name, group[0].item.player)
+                required_locations.difference_update(group)
+                if can_beat_game(num):
+                    return
+                # still required, got to keep it around
+                required_locations.update(group)
+            if len(group) == 1:
+                required_items.add(group[0].item)
+                return
+            half = len(group) // 2
+            cull(group[:half], num, required_items)
+            # if the game is beatable without the first half, the required location has to be in the second half
+            cull(group[half:], num, required_items, required_locations.isdisjoint(group[:half]))
+
         for num, sphere in reversed(tuple(enumerate(collection_spheres))):
-            to_delete: Set[Location] = set()
-            for location in sphere:
-                # we remove the location from required_locations to sweep from, and check if the game is still beatable
-                logging.debug('Checking if %s (Player %d) is required to beat the game.', location.item.name,
-                              location.item.player)
-                required_locations.remove(location)
-                if multiworld.can_beat_game(state_cache[num], required_locations):
-                    to_delete.add(location)
-                else:
-                    # still required, got to keep it around
-                    required_locations.add(location)
+            required_items: Set[Item] = set()
+            candidates = list(sphere)
+            index = 0
+            while index < len(candidates):
+                # groups get about as large as the number of removed locations per required one
+                group = candidates[index:index + max(1, round(removed_count / kept_count))]
+                index += len(group)
+                cull(group, num, required_items)
+                kept = sum(location in required_locations for location in group)
+                kept_count += kept
+                removed_count += len(group) - kept
 
             # cull entries in spheres for spoiler walkthrough at end
-            sphere -= to_delete
+            sphere.intersection_update(required_locations)
 
         # second phase, sphere 0
         removed_precollected: List[Item] = []
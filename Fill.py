@@ -33,6 +33,116 @@ def sweep_from_pool(base_state: CollectionState, itempool: typing.Sequence[Item]
     return new_state
 
 
+def _sweep_from_pool_in_order(base_state: CollectionState, itempool: typing.Sequence[Item],
+                              locations: typing.Optional[typing.List[Location]],
+                              sweep_order: typing.List[typing.List[Location]]) -> CollectionState:
+    """
+    Same as sweep_from_pool, but first goes through the locations in the order a previous sweep collected them in,
+    given as the locations collected by each of its iterations, so that most of the locations are only checked once.
+    The locations that can't be reached in their iteration are left to the usual sweep afterwards.
+    sweep_order is then replaced by the order of this sweep.
+    """
+    new_state = base_state.copy()
+    for item in itempool:
+        new_state.collect(item, True)
+    sweep_locations = None if locations is None else set(locations)
+    new_order: typing.List[typing.List[Location]] = []
+    for previous_locations in sweep_order:
+        reachable = [location for location in previous_locations
+                     if location.advancement and location not in new_state.advancements
+                     and (sweep_locations is None or location in sweep_locations) and location.can_reach(new_state)]
+        for location in reachable:
+            new_state.advancements.add(location)
+            new_state.collect(location.item, True, location)
+        if reachable:
+            new_order.append(reachable)
+    collected = set(new_state.advancements)
+    for _ in new_state.sweep_for_advancements(locations, yield_each_sweep=True):
+        if len(new_state.advancements) > len(collected):
+            new_order.append([location for location in new_state.advancements if location not in collected])
+            collected.update(new_order[-1])
+    sweep_order[:] = new_order
+    return new_state
+
+
+class _FillLocations:
+    """
+    The locations fill_restrictive fills, to find the first one, in order, that an item can be placed into without
+    checking the locations that can't take it in the current batch of items:
+    the locations of other players, with single player placement,
+    and the locations in regions that are not reachable in the state of the batch, for items that need an access check.
+    Only region reachability is cached, as location rules can depend on the items placed so far.
+    """
+    all_locations: typing.List[Location]
+    locations: typing.Dict[typing.Optional[int], typing.List[Location]]
+    """the locations by player with single player placement, else all of them under None"""
+    filled: typing.Set[Location]
+    remaining: int
+    filled_since_cleanup: int
+    state: CollectionState
+    accessible: typing.Dict[typing.Optional[int], typing.List[Location]]
+    """the checked locations that are in reachable regions, or could always be allowed an item"""
+    checked: typing.Dict[typing.Optional[int], int]
+    """how many of the locations have been checked for accessible"""
+
+    def __init__(self, locations: typing.List[Location], single_player_placement: bool) -> None:
+        self.single_player_placement = single_player_placement
+        self.all_locations = locations
+        self.locations = {}
+        for location in locations:
+            self.locations.setdefault(location.player if single_player_placement else None, []).append(location)
+        self.filled = set()
+        self.remaining = len(locations)
+        self.filled_since_cleanup = 0
+
+    def __bool__(self) -> bool:
+        return self.remaining > 0
+
+    def start_batch(self, state: CollectionState) -> None:
+        self.state = state
+        self.accessible = {}
+        self.checked = {}
+        if self.filled_since_cleanup > self.remaining:
+            self.locations = {key: [location for location in locations if location not in self.filled]
+                              for key, locations in self.locations.items()}
+            self.filled_since_cleanup = 0
+
+    def pop(self, item: Item, check_access: bool) -> typing.Optional[Location]:
+        """Removes and returns the first location that can be filled with the item, if there is one."""
+        key = item.player if self.single_player_placement else None
+        locations = self.locations.get(key, [])
+        filled = self.filled
+        state = self.state
+        spot_to_fill: typing.Optional[Location] = None
+        if not check_access:
+            spot_to_fill = next((location for location in locations
+                                 if location not in filled and location.can_fill(state, item, False)), None)
+        else:
+            accessible = self.accessible.setdefault(key, [])
+            spot_to_fill = next((location for location in accessible
+                                 if location not in filled and location.can_fill(state, item, True)), None)
+            checked = self.checked.get(key, 0)
+            while spot_to_fill is None and checked < len(locations):
+                location = locations[checked]
+                checked += 1
+                if location in filled or not (location.parent_region.can_reach(state)
+                                              or location.always_allow is not Location.always_allow):
+                    continue
+                accessible.append(location)
+                if location.can_fill(state, item, True):
+                    spot_to_fill = location
+            self.checked[key] = checked
+        if spot_to_fill is not None:
+            filled.add(spot_to_fill)
+            self.remaining -= 1
+            self.filled_since_cleanup += 1
+        return spot_to_fill
+
+    def unfilled(self) -> typing.List[Location]:
+        """Returns the locations that were not filled, in their original order."""
+        return [location for location in self.all_locations if location not in self.filled]
+
+
 def fill_restrictive(multiworld: MultiWorld, base_state: CollectionState, locations: typing.List[Location],
                      item_pool: typing.List[Item], single_player_placement: bool = False, lock: bool = False,
                      swap: bool = True, on_place: typing.Optional[typing.Callable[[Location], None]] = None,
@@ -63,7 +173,10 @@ def fill_restrictive(multiworld: MultiWorld, base_state: CollectionState, locati
     total = min(len(item_pool), len(locations))
     placed = 0
 
-    while any(reachable_items.values()) and locations:
+    fill_locations = _FillLocations(locations, single_player_placement)
+    # the order the previous maximum_exploration_state collected the placed items in, to collect them in that order again
+    exploration_order: typing.List[typing.List[Location]] = []
+    while any(reachable_items.values()) and fill_locations:
         if one_item_per_player:
             # grab one item per player
             items_to_place = [items.pop()
@@ -82,15 +195,16 @@ def fill_restrictive(multiworld: MultiWorld, base_state: CollectionState, locati
                     del item_pool[-p]
                     break
 
-        maximum_exploration_state = sweep_from_pool(
+        maximum_exploration_state = _sweep_from_pool_in_order(
             base_state, item_pool + unplaced_items, multiworld.get_filled_locations(item.player)
-            if single_player_placement else None)
+            if single_player_placement else None, exploration_order)
 
         has_beaten_game = multiworld.has_beaten_game(maximum_exploration_state)
+        fill_locations.start_batch(maximum_exploration_state)
 
         while items_to_place:
             # if we have run out of locations to fill,break out of this loop
-            if not locations:
+            if not fill_locations:
                 unplaced_items += items_to_place
                 break
             item_to_place = items_to_place.pop(0)
@@ -105,15 +219,8 @@ def fill_restrictive(multiworld: MultiWorld, base_state: CollectionState, locati
             else:
                 perform_access_check = True
 
-            for i, location in enumerate(locations):
-                if (not single_player_placement or location.player == item_to_place.player) \
-                        and location.can_fill(maximum_exploration_state, item_to_place, perform_access_check):
-                    # popping by index is faster than removing by content,
-                    spot_to_fill = locations.pop(i)
-                    # skipping a scan for the element
-                    break
-
-            else:
+            spot_to_fill = fill_locations.pop(item_to_place, perform_access_check)
+            if spot_to_fill is None:
                 # we filled all reachable spots.
                 if swap:
                     # Keep a cache of previous safe swap states that might be usable to sweep from to produce the next
@@ -209,6 +316,8 @@ def fill_restrictive(multiworld: MultiWorld, base_state: CollectionState, locati
     if total > 1000:
         _log_fill_progress(name, placed, total)
 
+    locations[:] = fill_locations.unfilled()
+
     if cleanup_required:
         # validate all placements and remove invalid ones
         state = sweep_from_pool(
@@ -850,30 +959,62 @@ def balance_multiworld_progression(multiworld: MultiWorld) -> None:
                         if l not in balancing_unchecked_locations:
                             unlocked_locations[l.player].add(l)
                     items_to_replace: typing.List[Location] = []
+
+                    def is_reduced(player: int, locations_to_test: typing.Set[Location],
+                                   items_to_test: typing.List[Location]) -> bool:
+                        """Returns if the player falls below the threshold with only the kept and tested items"""
+                        reducing_state = state.copy()
+                        for location in itertools.chain((
+                                l for l in items_to_replace
+                                if l.item.player == player
+                        ), items_to_test):
+                            reducing_state.collect(location.item, True, location)
+
+                        reducing_state.sweep_for_advancements(locations=locations_to_test)
+
+                        if multiworld.has_beaten_game(balancing_state):
+                            return not multiworld.has_beaten_game(reducing_state)
+                        reduced_sphere = get_sphere_locations(reducing_state, locations_to_test)
+                        p = item_percentage(player, reachable_locations_count[player] + len(reduced_sphere))
+                        return p < threshold_percentages[player]
+
+                    def test_items(player: int, locations_to_test: typing.Set[Location],
+                                   items_to_test: typing.List[Location], group: typing.List[Location],
+                                   reduced: bool = False) -> None:
+                        """
+                        Removes a group of items from the end of items_to_test at once, and only tests them one at a
+                        time, splitting the group, if the player falls below the threshold without them.
+                        As more items only ever reach more locations, this replaces the same items as testing each one.
+                        """
+                        if not reduced and not is_reduced(player, locations_to_test, items_to_test):
+                            return
+                        if len(group) == 1:
+                            items_to_replace.append(group[0])
+                            return
+                        first_half, second_half = group[:len(group) // 2], group[len(group) // 2:]
+                        replaced_count = len(items_to_replace)
+                        items_to_test.extend(first_half)
+                        test_items(player, locations_to_test, items_to_test, second_half)
+                        del items_to_test[-len(first_half):]
+                        # if none of the second half was replaced, the player is known to fall below without the first
+                        test_items(player, locations_to_test, items_to_test, first_half,
+                                   len(items_to_replace) == replaced_count)
+
                     for player in balancing_players:
                         locations_to_test = unlocked_locations[player]
                         items_to_test = list(candidate_items[player])
                         items_to_test.sort()
                         multiworld.random.shuffle(items_to_test)
+                        # size the groups by how many items were not replaced per replaced item so far
+                        kept_count = removed_count = 1
                         while items_to_test:
-                            testing = items_to_test.pop()
-                            reducing_state = state.copy()
-                            for location in itertools.chain((
-                                    l for l in items_to_replace
-                                    if l.item.player == player
-                            ), items_to_test):
-                                reducing_state.collect(location.item, True, location)
-
-                            reducing_state.sweep_for_advancements(locations=locations_to_test)
-
-                            if multiworld.has_beaten_game(balancing_state):
-                                if not multiworld.has_beaten_game(reducing_state):
-                                    items_to_replace.append(testing)
-                            else:
-                                reduced_sphere = get_sphere_locations(reducing_state, locations_to_test)
-                                p = item_percentage(player, reachable_locations_count[player] + len(reduced_sphere))
-                                if p < threshold_percentages[player]:
-                                    items_to_replace.append(testing)
+                            group_size = min(len(items_to_test), max(1, round(removed_count / kept_count)))
+                            group = items_to_test[-group_size:]
+                            del items_to_test[-group_size:]
+                            replaced_count = len(items_to_replace)
+                            test_items(player, locations_to_test, items_to_test, group)
+                            kept_count += len(items_to_replace) - replaced_count
+                            removed_count += group_size - (len(items_to_replace) - replaced_count)
 
                     old_moved_item_count = moved_item_count
 
@@ -931,6 +1072,7 @@ def swap_location_item(location_1: Location, location_2: Location, check_locked:
     location_2.item, location_1.item = location_1.item, location_2.item
     location_1.item.location = location_1
     location_2.item.location = location_2
+    location_1.parent_region.multiworld.placement_version += 1
 
 
 def parse_planned_blocks(multiworld: MultiWorld) -> dict[int, list[PlandoItemBlock]]:
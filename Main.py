@@ -10,7 +10,7 @@ import zipfile
 import zlib
 
 import worlds
-from BaseClasses import CollectionState, Item, Location, LocationProgressType, MultiWorld
+from BaseClasses import CollectionState, Item, Location, LocationProgressType, MultiWorld, SphereIndex
 from Fill import FillError, balance_multiworld_progression, distribute_items_restrictive, flood_items, \
     parse_planned_blocks, distribute_planned_blocks, resolve_early_locations_for_planned
 from NetUtils import convert_to_base_types
@@ -207,6 +207,9 @@ def main(args, seed=None, baked_server_options: dict[str, object] | None = None)
     else:
         logger.info("Progression balancing skipped.")
 
+    # items are in their final places now, so the output steps can share their sphere calculations
+    multiworld.sphere_index = SphereIndex(multiworld)
+
     # we're about to output using multithreading, so we're removing the global random state to prevent accidental use
     multiworld.random.passthrough = False
 
@@ -226,6 +229,9 @@ def main(args, seed=None, baked_server_options: dict[str, object] | None = None)
         logger.info('Done. Skipped multidata modification. Total time: %s', time.perf_counter() - start)
         return multiworld
 
+    # calculated up front on this thread, so the output threads only ever copy the shared sphere states
+    multiworld.sphere_index.get_progression_spheres()
+
     output = tempfile.TemporaryDirectory()
     with output as temp_dir:
         output_players = [player for player in multiworld.player_ids if AutoWorld.World.generate_output.__code__
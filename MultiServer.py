@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import argparse
+import array
 import asyncio
 import collections
 import contextlib
@@ -13,6 +14,7 @@ import itertools
 import logging
 import math
 import operator
+import os
 import pickle
 import random
 import shlex
@@ -59,6 +61,10 @@ server_per_message_deflate_factory = ServerPerMessageDeflateFactory(
     compress_settings={"memLevel": 4},
 )
 
+data_package_cache_size = 16
+_encoded_data_packages: typing.Dict[typing.Tuple[typing.Tuple[str, str], ...], str] = {}
+"""encoded DataPackage messages by the names and checksums of their games, shared by all contexts of the process"""
+
 
 def remove_from_list(container, value):
     try:
@@ -133,6 +139,231 @@ def get_saving_second(seed_name: str, interval: int = 60) -> int:
     return int(hashlib.sha256(seed_name.encode()).hexdigest(), 16) % interval
 
 
+class SaveJournal:
+    """
+    Appends the changes to a save since the last time it was written to a journal file next to the save file,
+    instead of writing the whole save every time. The save file itself is only rewritten once the journal grows
+    larger than it, after which the journal starts over.
+    The changes are recorded where they are made, so writing an entry does not need a snapshot of the whole save.
+    """
+    journaled_keys = ("received_items", "location_checks", "hints", "stored_data")
+
+    filename: str
+    journal_id: int
+    """stored in the save file and every entry of its journal, so entries of an older journal are never replayed"""
+    rewrite_save: bool
+    save_size: int
+    journal_size: int
+    received_counts: typing.Dict[typing.Tuple[int, int, bool], int]
+    new_location_checks: typing.Set[typing.Tuple[int, int, int]]
+    """team, slot and location of the location checks since the last write"""
+    changed_hints: typing.Set[team_slot]
+    """teams and slots whose hints changed since the last write"""
+    changed_stored_data: typing.Set[str]
+    """keys of stored_data that changed since the last write"""
+
+    def __init__(self, save_filename: str) -> None:
+        self.save_filename = save_filename
+        self.filename = save_filename + ".journal"
+        self.rewrite_save = True
+        self.save_size = self.journal_size = 0
+        self.received_counts = {}
+        self.new_location_checks = set()
+        self.changed_hints = set()
+        self.changed_stored_data = set()
+
+    @property
+    def save_due(self) -> bool:
+        """If the whole save has to be written next, instead of an entry of the journal."""
+        return self.rewrite_save or self.journal_size > self.save_size
+
+    def add_location_checks(self, team: int, slot: int, locations: typing.Iterable[int]) -> None:
+        self.new_location_checks.update((team, slot, location) for location in locations)
+
+    def clear_changes(self) -> None:
+        """Forgets the recorded changes, for when the whole save is about to be written."""
+        self.new_location_checks.clear()
+        self.changed_hints.clear()
+        self.changed_stored_data.clear()
+
+    def replay(self, save_data: typing.Dict[str, typing.Any]) -> int:
+        """Applies the entries of the journal that belong to the save to it. Returns the number of entries applied."""
+        try:
+            with open(self.filename, "rb") as f:
+                journal = f.read()
+        except FileNotFoundError:
+            return 0
+        applied = 0
+        position = 0
+        while position < len(journal):
+            size = int.from_bytes(journal[position:position + 4], "little")
+            entry_data = journal[position + 4:position + 4 + size]
+            position += 4 + size
+            try:
+                entry = restricted_loads(zlib.decompress(entry_data))
+            except Exception as e:
+                logging.warning(f"Ignoring the rest of {self.filename} from an invalid entry: {e!r}")
+                break
+            if entry["journal_id"] != save_data.get("journal_id"):
+                continue
+            for key, (start, items) in entry["received_items"].items():
+                save_data["received_items"].setdefault(key, [])[start:] = items
+            for key, locations in entry["location_checks"].items():
+                save_data["location_checks"].setdefault(key, set()).update(locations)
+            save_data["hints"].update(entry["hints"])
+            save_data.setdefault("stored_data", {}).update(entry["stored_data"])
+            save_data.update(entry["rest"])
+            applied += 1
+        return applied
+
+    def write(self, received_items: typing.Mapping[team_slot, ReceivedItems],
+              hints: typing.Mapping[team_slot, typing.AbstractSet[Hint]], stored_data: typing.Dict[str, typing.Any],
+              rest: typing.Dict[str, typing.Any]) -> None:
+        """
+        Appends the changes since the last write to the journal.
+        Of received_items, only the items past the ones written before are read,
+        of hints and stored_data only the recorded changes, and rest is written as a whole.
+        """
+        received: typing.Dict[typing.Tuple[int, int, bool], typing.Tuple[int, typing.List[NetworkItem]]] = {}
+        for (team, slot), slot_items in list(received_items.items()):
+            for key, items in (((team, slot, True), slot_items), ((team, slot, False), slot_items.non_remote)):
+                start = self.received_counts.get(key, 0)
+                if len(items) > start:
+                    received[key] = start, items[start:]
+        location_checks: typing.Dict[team_slot, typing.Set[int]] = {}
+        while self.new_location_checks:
+            team, slot, location = self.new_location_checks.pop()
+            location_checks.setdefault((team, slot), set()).add(location)
+        changed_hints: typing.Dict[team_slot, typing.Set[Hint]] = {}
+        while self.changed_hints:
+            key = self.changed_hints.pop()
+            changed_hints[key] = set(hints[key])
+        changed_stored_data: typing.Dict[str, typing.Any] = {}
+        while self.changed_stored_data:
+            key = self.changed_stored_data.pop()
+            if key in stored_data:
+                changed_stored_data[key] = stored_data[key]
+        entry = {
+            "journal_id": self.journal_id,
+            "received_items": received,
+            "location_checks": location_checks,
+            "hints": changed_hints,
+            "stored_data": changed_stored_data,
+            "rest": rest,
+        }
+        # Does not use Utils.restricted_dumps because we'd rather make a save than not make one
+        entry_data = zlib.compress(pickle.dumps(entry))
+        with open(self.filename, "ab") as f:
+            f.write(len(entry_data).to_bytes(4, "little") + entry_data)
+        self.journal_size += 4 + len(entry_data)
+        for key, (start, items) in received.items():
+            self.received_counts[key] = start + len(items)
+
+    def write_save(self, save_data: typing.Dict[str, typing.Any], remove_journal: bool = False) -> None:
+        """Writes the whole save and starts a new journal, or removes the journal if remove_journal is set.
+        Changes recorded before save_data was taken have to be cleared with clear_changes first."""
+        self.journal_id = random.getrandbits(64)
+        self.received_counts = {key: len(items) for key, items in save_data["received_items"].items()}
+        # Does not use Utils.restricted_dumps because we'd rather make a save than not make one
+        encoded_save = zlib.compress(pickle.dumps({**save_data, "journal_id": self.journal_id}))
+        with open(self.save_filename + ".tmp", "wb") as f:
+            f.write(encoded_save)
+        os.replace(self.save_filename + ".tmp", self.save_filename)
+        # the entries left in the journal now belong to an older journal_id, so a crash here loses nothing
+        if remove_journal:
+            try:
+                os.remove(self.filename)
+            except FileNotFoundError:
+                pass
+        else:
+            with open(self.filename, "wb"):
+                pass
+        self.save_size = len(encoded_save)
+        self.journal_size = 0
+        self.rewrite_save = False
+
+
+class ReceivedItems(typing.Sequence[NetworkItem]):
+    """
+    The items received by a slot, kept as columns of arrays, which take a fraction of the memory of NetworkItems.
+    The view of the items that clients without remote_items receive as well is non_remote.
+    """
+    __slots__ = ("items", "locations", "players", "flags", "non_remote")
+
+    def __init__(self) -> None:
+        self.items = array.array("q")
+        self.locations = array.array("q")
+        self.players = array.array("i")
+        self.flags = array.array("i")
+        self.non_remote = NonRemoteReceivedItems(self)
+
+    @classmethod
+    def from_lists(cls, items: typing.Sequence[NetworkItem],
+                   non_remote_items: typing.Sequence[NetworkItem]) -> ReceivedItems:
+        """Creates the items of a slot from the lists of items with and without remote_items in a save."""
+        received_items = cls()
+        non_remote_index = 0
+        for item in items:
+            # the non-remote items are in the same order as all items, so matching them in order restores the view
+            non_remote = non_remote_index < len(non_remote_items) and non_remote_items[non_remote_index] == item
+            if non_remote:
+                non_remote_index += 1
+            received_items.append(item, non_remote)
+        return received_items
+
+    def append(self, item: NetworkItem, non_remote: bool) -> None:
+        if non_remote:
+            self.non_remote.positions.append(len(self.items))
+        self.items.append(item.item)
+        self.locations.append(item.location)
+        self.players.append(item.player)
+        self.flags.append(item.flags)
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    @typing.overload
+    def __getitem__(self, index: int) -> NetworkItem: ...
+
+    @typing.overload
+    def __getitem__(self, index: slice) -> typing.List[NetworkItem]: ...
+
+    def __getitem__(self, index: typing.Union[int, slice]) -> typing.Union[NetworkItem, typing.List[NetworkItem]]:
+        if isinstance(index, slice):
+            return list(map(NetworkItem._make, zip(self.items[index], self.locations[index],
+                                                   self.players[index], self.flags[index])))
+        return NetworkItem(self.items[index], self.locations[index], self.players[index], self.flags[index])
+
+    def __iter__(self) -> typing.Iterator[NetworkItem]:
+        return map(NetworkItem._make, zip(self.items, self.locations, self.players, self.flags))
+
+
+class NonRemoteReceivedItems(typing.Sequence[NetworkItem]):
+    """The items of a ReceivedItems that clients without remote_items receive, by their position in it."""
+    __slots__ = ("received_items", "positions")
+
+    def __init__(self, received_items: ReceivedItems) -> None:
+        self.received_items = received_items
+        self.positions = array.array("L")
+
+    def __len__(self) -> int:
+        return len(self.positions)
+
+    @typing.overload
+    def __getitem__(self, index: int) -> NetworkItem: ...
+
+    @typing.overload
+    def __getitem__(self, index: slice) -> typing.List[NetworkItem]: ...
+
+    def __getitem__(self, index: typing.Union[int, slice]) -> typing.Union[NetworkItem, typing.List[NetworkItem]]:
+        if isinstance(index, slice):
+            return [self.received_items[position] for position in self.positions[index]]
+        return self.received_items[self.positions[index]]
+
+    def __iter__(self) -> typing.Iterator[NetworkItem]:
+        return map(self.received_items.__getitem__, self.positions)
+
+
 class Client(Endpoint):
     __slots__ = (
         "__weakref__",
@@ -222,6 +453,8 @@ class Context:
                       "compatibility": int}
     # team -> slot id -> list of clients authenticated to slot.
     clients: typing.Dict[int, typing.Dict[int, typing.List[Client]]]
+    # (team, tag) -> clients authenticated with the tag.
+    tagged_clients: typing.Dict[typing.Tuple[int, str], typing.Set[Client]]
     endpoints: list[Client]
     locations: LocationStore  # typing.Dict[int, typing.Dict[int, typing.Tuple[int, int, int]]]
     location_checks: typing.Dict[typing.Tuple[int, int], typing.Set[int]]
@@ -232,6 +465,7 @@ class Context:
     read_data: typing.Dict[str, object]
     stored_data_notification_clients: typing.Dict[str, typing.Set[Client]]
     slot_info: typing.Dict[int, NetworkSlot]
+    slots_by_game: typing.Dict[str, typing.List[int]]
     generator_version = Version(0, 0, 0)
     checksums: typing.Dict[str, str]
     item_names: typing.Dict[str, typing.Dict[int, str]]
@@ -255,10 +489,11 @@ class Context:
         self.log_network = log_network
         self.endpoints = []
         self.clients = {}
+        self.tagged_clients = {}
         self.compatibility: int = compatibility
         self.shutdown_task = None
         self.data_filename = None
-        self.save_filename = None
+        self.save_filename: typing.Optional[str] = None
         self.saving = False
         self.player_names: typing.Dict[team_slot, str] = {}
         self.player_name_lookup: typing.Dict[str, team_slot] = {}
@@ -270,7 +505,10 @@ class Context:
         self.password = password
         self.server = None
         self.countdown_timer = 0
-        self.received_items = {}
+        self.received_items: typing.Dict[team_slot, ReceivedItems] = {}
+        self.new_items_receivers: typing.Set[team_slot] = set()
+        self.team_texts: typing.Dict[int, typing.List[dict]] = {}
+        self.delivery_scheduled = False
         self.start_inventory = {}
         self.name_aliases: typing.Dict[team_slot, str] = {}
         self.location_checks = collections.defaultdict(set)
@@ -278,6 +516,9 @@ class Context:
         self.location_check_points = location_check_points
         self.hints_used = collections.defaultdict(int)
         self.hints: typing.Dict[team_slot, typing.Set[Hint]] = collections.defaultdict(set)
+        self.hints_by_location: typing.Dict[team_slot, typing.Dict[int, typing.Set[Hint]]] = \
+            collections.defaultdict(dict)
+        """the hints of self.hints that are found by that slot, by location"""
         self.release_mode: str = release_mode
         self.remaining_mode: str = remaining_mode
         self.collect_mode: str = collect_mode
@@ -297,8 +538,10 @@ class Context:
         self.auto_save_interval = 60  # in seconds
         self.auto_saver_thread: typing.Optional[threading.Thread] = None
         self.save_dirty = False
+        self.save_journal: typing.Optional[SaveJournal] = None
         self.tags = ['AP']
         self.games: typing.Dict[int, str] = {}
+        self.slots_by_game = {}
         self.minimum_client_versions: typing.Dict[int, Version] = {}
         self.seed_name = ""
         self.groups = {}
@@ -338,8 +581,8 @@ class Context:
 
         for game_package in self.gamespackage.values():
             # remove groups from data sent to clients
-            del game_package["item_name_groups"]
-            del game_package["location_name_groups"]
+            game_package.pop("item_name_groups", None)
+            game_package.pop("location_name_groups", None)
 
     def _init_game_data(self):
         for game_name, game_package in self.gamespackage.items():
@@ -368,9 +611,19 @@ class Context:
         return self.gamespackage[game]["location_name_to_id"] if game in self.gamespackage else None
 
     # General networking
-    async def send_msgs(self, endpoint: Endpoint, msgs: typing.Iterable[dict]) -> bool:
+    def pop_new_items_msg(self, endpoint: Endpoint) -> typing.Optional[dict]:
+        """Returns the ReceivedItems message of a connected client's items that are waiting to be delivered,
+        so that they can be sent ahead of any other message to it."""
+        if not isinstance(endpoint, Client) or not endpoint.auth:
+            return None
+        return pop_new_items_msg(self, endpoint, endpoint.team, endpoint.slot)
+
+    async def send_msgs(self, endpoint: Endpoint, msgs: typing.Iterable[typing.Dict[str, typing.Any]]) -> bool:
         if not endpoint.socket or not endpoint.socket.open:
             return False
+        new_items_msg = self.pop_new_items_msg(endpoint)
+        if new_items_msg:
+            msgs = [new_items_msg, *msgs]
         msg = self.dumper(msgs)
         try:
             await endpoint.socket.send(msg)
@@ -386,7 +639,10 @@ class Context:
     async def send_encoded_msgs(self, endpoint: Endpoint, msg: str) -> bool:
         if not endpoint.socket or not endpoint.socket.open:
             return False
+        new_items_msg = self.pop_new_items_msg(endpoint)
         try:
+            if new_items_msg:
+                await endpoint.socket.send(self.dumper([new_items_msg]))
             await endpoint.socket.send(msg)
         except websockets.ConnectionClosed:
             self.logger.exception("Exception during send_encoded_msgs")
@@ -398,19 +654,42 @@ class Context:
             return True
 
     async def broadcast_send_encoded_msgs(self, endpoints: typing.Iterable[Endpoint], msg: str) -> bool:
+        return await self.broadcast_send_encoded_msgs_list(endpoints, [msg])
+
+    async def broadcast_send_encoded_msgs_list(self, endpoints: typing.Iterable[Endpoint],
+                                               msgs: typing.Sequence[str]) -> bool:
         sockets = []
         for endpoint in endpoints:
             if endpoint.socket and endpoint.socket.open:
                 sockets.append(endpoint.socket)
-        try:
-            websockets.broadcast(sockets, msg)
-        except RuntimeError:
-            self.logger.exception("Exception during broadcast_send_encoded_msgs")
-            return False
-        else:
-            if self.log_network:
-                self.logger.info(f"Outgoing broadcast: {msg}")
-            return True
+                new_items_msg = self.pop_new_items_msg(endpoint)
+                if new_items_msg:
+                    # broadcast writes synchronously, so this goes out before the broadcast messages
+                    websockets.broadcast([endpoint.socket], self.dumper([new_items_msg]))
+        for msg in msgs:
+            try:
+                websockets.broadcast(sockets, msg)
+            except RuntimeError:
+                self.logger.exception("Exception during broadcast_send_encoded_msgs")
+                return False
+            else:
+                if self.log_network:
+                    self.logger.info(f"Outgoing broadcast: {msg}")
+        return True
+
+    def encode_data_package(self, games: typing.Mapping[str, typing.Mapping[str, typing.Any]]) -> str:
+        """Returns the encoded DataPackage message of the games,
+        reusing the one encoded for an earlier request of the same games, if they all have a checksum."""
+        if not all("checksum" in game_package for game_package in games.values()):
+            return self.dumper([{"cmd": "DataPackage", "data": {"games": games}}])
+        key = tuple(sorted((game, game_package["checksum"]) for game, game_package in games.items()))
+        msg = _encoded_data_packages.get(key)
+        if msg is None:
+            msg = self.dumper([{"cmd": "DataPackage", "data": {"games": games}}])
+            if len(_encoded_data_packages) >= data_package_cache_size:
+                del _encoded_data_packages[next(iter(_encoded_data_packages))]
+            _encoded_data_packages[key] = msg
+        return msg
 
     def broadcast_all(self, msgs: typing.List[dict]):
         msg_is_text = all(msg["cmd"] == "PrintJSON" for msg in msgs)
@@ -445,8 +724,21 @@ class Context:
             self.endpoints.remove(endpoint)
         if endpoint.slot and endpoint in self.clients[endpoint.team][endpoint.slot]:
             self.clients[endpoint.team][endpoint.slot].remove(endpoint)
+        self.untag_client(endpoint)
         await on_client_disconnected(self, endpoint)
 
+    def tag_client(self, client: Client) -> None:
+        for tag in client.tags:
+            self.tagged_clients.setdefault((client.team, tag), set()).add(client)
+
+    def untag_client(self, client: Client) -> None:
+        for tag in client.tags:
+            tagged = self.tagged_clients.get((client.team, tag))
+            if tagged and client in tagged:
+                tagged.remove(client)
+                if not tagged:
+                    del self.tagged_clients[client.team, tag]
+
     def notify_client(self, client: Client, text: str, additional_arguments: dict = {}):
         if not client.auth or client.no_text:
             return
@@ -507,6 +799,9 @@ class Context:
 
         self.slot_info = decoded_obj["slot_info"]
         self.games = {slot: slot_info.game for slot, slot_info in self.slot_info.items()}
+        self.slots_by_game = {}
+        for slot, game in self.games.items():
+            self.slots_by_game.setdefault(game, []).append(slot)
         self.groups = {slot: set(slot_info.group_members) for slot, slot_info in self.slot_info.items()
                        if slot_info.type == SlotType.group}
 
@@ -540,6 +835,7 @@ class Context:
 
         for slot, hints in decoded_obj["precollected_hints"].items():
             self.hints[0, slot].update(hints)
+            self.index_hints(0, slot)
 
         # declare slots that aren't players as done
         for slot, slot_info in self.slot_info.items():
@@ -570,6 +866,7 @@ class Context:
 
         # sorted access spheres
         self.spheres = decoded_obj.get("spheres", [])
+        self.locations.set_spheres(self.spheres)
 
     # saving
 
@@ -586,12 +883,29 @@ class Context:
 
     def _save(self, exit_save: bool = False) -> bool:
         try:
-            # Does not use Utils.restricted_dumps because we'd rather make a save than not make one
-            encoded_save = pickle.dumps(self.get_save())
-            with open(self.save_filename, "wb") as f:
-                f.write(zlib.compress(encoded_save))
+            if self.save_journal:
+                # only the hints of locations checked since the last save can have been found
+                new_location_checks: typing.Dict[team_slot, typing.Set[int]] = collections.defaultdict(set)
+                for team, slot, location in list(self.save_journal.new_location_checks):
+                    new_location_checks[team, slot].add(location)
+                for (team, slot), locations in new_location_checks.items():
+                    self.recheck_hints(team, slot, locations=locations)
+            if self.save_journal and not self.save_journal.save_due and not exit_save:
+                self.save_journal.write(self.received_items, self.hints, self.stored_data, self.get_save_rest())
+            elif self.save_journal:
+                # the save is left complete on its own on exit
+                self.save_journal.clear_changes()
+                self.save_journal.write_save(self.get_save(), remove_journal=exit_save)
+            else:
+                # Does not use Utils.restricted_dumps because we'd rather make a save than not make one
+                encoded_save = pickle.dumps(self.get_save())
+                with open(self.save_filename, "wb") as f:
+                    f.write(zlib.compress(encoded_save))
         except Exception as e:
             self.logger.exception(e)
+            if self.save_journal:
+                # the journal may be missing changes or end in a partial entry now
+                self.save_journal.rewrite_save = True
             return False
         else:
             return True
@@ -600,14 +914,17 @@ class Context:
         self.saving = enabled
         if self.saving:
             if not self.save_filename:
-                import os
                 name, ext = os.path.splitext(self.data_filename)
                 self.save_filename = name + '.apsave' if ext.lower() in ('.archipelago', '.zip') \
                     else self.data_filename + '_' + 'apsave'
+            self.save_journal = SaveJournal(self.save_filename)
             try:
                 with open(self.save_filename, 'rb') as f:
                     save_data = restricted_loads(zlib.decompress(f.read()))
-                    self.set_save(save_data)
+                applied = self.save_journal.replay(save_data)
+                if applied:
+                    self.logger.info(f"Applied {applied} changes from {self.save_journal.filename}")
+                self.set_save(save_data)
             except FileNotFoundError:
                 self.logger.error('No save data found, starting a new game')
             except Exception as e:
@@ -647,13 +964,21 @@ class Context:
 
     def get_save(self) -> dict:
         self.recheck_hints()
-        d = {
+        d = self.get_save_rest()
+        d.update({
+            "received_items": self.get_received_items_save(),
+            "hints": dict(self.hints),
+            "location_checks": dict(self.location_checks),
+            "stored_data": self.stored_data,
+        })
+        return d
+
+    def get_save_rest(self) -> dict:
+        """Returns the parts of the save that the save journal does not record the changes of."""
+        return {
             "version": self.save_version,
             "connect_names": self.connect_names,
-            "received_items": self.received_items,
             "hints_used": dict(self.hints_used),
-            "hints": dict(self.hints),
-            "location_checks": dict(self.location_checks),
             "name_aliases": self.name_aliases,
             "client_game_state": dict(self.client_game_state),
             "client_activity_timers": tuple(
@@ -662,7 +987,6 @@ class Context:
                 (key, value.timestamp()) for key, value in self.client_connection_timers.items()),
             "random_state": self.random.getstate(),
             "group_collected": dict(self.group_collected),
-            "stored_data": self.stored_data,
             "game_options": {"hint_cost": self.hint_cost, "location_check_points": self.location_check_points,
                              "server_password": self.server_password, "password": self.password,
                              "release_mode": self.release_mode,
@@ -672,16 +996,20 @@ class Context:
 
         }
 
-        return d
-
     def set_save(self, savedata: dict):
         if self.connect_names != savedata["connect_names"]:
             raise Exception("This savegame does not appear to match the loaded multiworld.")
         if savedata["version"] > self.save_version:
             raise Exception("This savegame is newer than the server.")
-        self.received_items = savedata["received_items"]
+        self.received_items = {}
+        for (team, slot, remote_items), items in savedata["received_items"].items():
+            if remote_items:
+                self.received_items[team, slot] = ReceivedItems.from_lists(
+                    items, savedata["received_items"].get((team, slot, False), ()))
         self.hints_used.update(savedata["hints_used"])
         self.hints.update(savedata["hints"])
+        for team, slot in savedata["hints"]:
+            self.index_hints(team, slot)
 
         self.name_aliases.update(savedata["name_aliases"])
         self.client_game_state.update(savedata["client_game_state"])
@@ -713,8 +1041,18 @@ class Context:
             self.stored_data = savedata["stored_data"]
         # count items and slots from lists for items_handling = remote
         self.logger.info(
-            f'Loaded save file with {sum([len(v) for k, v in self.received_items.items() if k[2]])} received items '
-            f'for {sum(k[2] for k in self.received_items)} players')
+            f'Loaded save file with {sum(len(items) for items in self.received_items.values())} received items '
+            f'for {len(self.received_items)} players')
+
+    def get_received_items_save(self) -> typing.Dict[typing.Tuple[int, int, bool], typing.List[NetworkItem]]:
+        """Returns the received items in the lists of NetworkItems with and without remote_items that saves hold.
+        Only needed to write the whole save, as the save journal reads the new items from received_items."""
+        received_items: typing.Dict[typing.Tuple[int, int, bool], typing.List[NetworkItem]] = {}
+        for (team, slot), slot_items in self.received_items.items():
+            items = received_items[team, slot, True] = list(slot_items)
+            # shares the NetworkItems with the list of all items, so they are pickled only once
+            received_items[team, slot, False] = [items[position] for position in slot_items.non_remote.positions]
+        return received_items
 
     # rest
 
@@ -724,11 +1062,25 @@ class Context:
         return 0
 
     def recheck_hints(self, team: typing.Optional[int] = None, slot: typing.Optional[int] = None,
-                      changed: typing.Optional[typing.Set[team_slot]] = None) -> None:
+                      changed: typing.Optional[typing.Set[team_slot]] = None,
+                      locations: typing.Optional[typing.Iterable[int]] = None) -> None:
         """Refreshes the hints for the specified team/slot. Providing 'None' for either team or slot
         will refresh all teams or all slots respectively. If a set is passed for 'changed', each (team,slot)
         pair that has at least one hint modified will be added to the set.
+        If locations of the slot are passed, only the hints for those locations are refreshed.
         """
+        if locations is not None and team is not None and slot is not None:
+            slot_hints = self.hints_by_location[team, slot]
+            for location in locations:
+                for hint in tuple(slot_hints.get(location, ())):
+                    new_hint = hint.re_check(self, team)
+                    if hint == new_hint:
+                        continue
+                    for player in self.slot_set(hint.receiving_player) | {hint.finding_player}:
+                        if changed is not None:
+                            changed.add((team, player))
+                        self.replace_hint(team, player, hint, new_hint)
+            return
         for hint_team, hint_slot in self.hints:
             if team != hint_team and team is not None:
                 continue  # Check specified team only, all if team is None
@@ -746,6 +1098,7 @@ class Context:
                     if slot is not None and slot != player:
                         self.replace_hint(hint_team, player, hint, new_hint)
             self.hints[hint_team, hint_slot] = new_hints
+            self.index_hints(hint_team, hint_slot)
 
     def get_rechecked_hints(self, team: int, slot: int):
         self.recheck_hints(team, slot)
@@ -754,11 +1107,14 @@ class Context:
     def get_sphere(self, player: int, location_id: int) -> int:
         """Get sphere of a location, -1 if spheres are not available."""
         if self.spheres:
-            for i, sphere in enumerate(self.spheres):
-                if location_id in sphere.get(player, set()):
-                    return i
-            raise KeyError(f"No Sphere found for location ID {location_id} belonging to player {player}. "
-                           f"Location or player may not exist.")
+            try:
+                sphere = self.locations.get_sphere(player, location_id)
+            except KeyError:
+                sphere = -1
+            if sphere == -1:
+                raise KeyError(f"No Sphere found for location ID {location_id} belonging to player {player}. "
+                               f"Location or player may not exist.")
+            return sphere
         return -1
 
     def get_players_package(self):
@@ -817,6 +1173,7 @@ class Context:
                 # we can check once if hint already exists
                 if hint not in self.hints[team, hint.finding_player]:
                     self.hints[team, hint.finding_player].add(hint)
+                    self.hints_by_location[team, hint.finding_player].setdefault(hint.location, set()).add(hint)
                     new_hint_events.add(hint.finding_player)
                     for player in self.slot_set(hint.receiving_player):
                         self.hints[team, player].add(hint)
@@ -824,6 +1181,8 @@ class Context:
 
             self.logger.info("Notice (Team #%d): %s" % (team + 1, format_hint(self, team, hint)))
         for slot in new_hint_events:
+            if self.save_journal:
+                self.save_journal.changed_hints.add((team, slot))
             self.on_new_hint(team, slot)
         for slot, hint_data in concerns.items():
             if recipients is None or slot in recipients:
@@ -835,15 +1194,28 @@ class Context:
                     async_start(self.send_msgs(client, client_hints))
 
     def get_hint(self, team: int, finding_player: int, seeked_location: int) -> typing.Optional[Hint]:
-        for hint in self.hints[team, finding_player]:
-            if hint.location == seeked_location and hint.finding_player == finding_player:
-                return hint
-        return None
+        return next(iter(self.hints_by_location[team, finding_player].get(seeked_location, ())), None)
     
     def replace_hint(self, team: int, slot: int, old_hint: Hint, new_hint: Hint) -> None:
         if old_hint in self.hints[team, slot]:
             self.hints[team, slot].remove(old_hint)
             self.hints[team, slot].add(new_hint)
+            if self.save_journal:
+                self.save_journal.changed_hints.add((team, slot))
+            if new_hint.finding_player == slot:
+                slot_hints = self.hints_by_location[team, slot]
+                slot_hints.get(old_hint.location, set()).discard(old_hint)
+                slot_hints.setdefault(new_hint.location, set()).add(new_hint)
+
+    def index_hints(self, team: int, slot: int) -> None:
+        """Updates hints_by_location after self.hints[team, slot] was replaced or changed directly."""
+        if self.save_journal:
+            self.save_journal.changed_hints.add((team, slot))
+        slot_hints: typing.Dict[int, typing.Set[Hint]] = {}
+        for hint in self.hints[team, slot]:
+            if hint.finding_player == slot:
+                slot_hints.setdefault(hint.location, set()).add(hint)
+        self.hints_by_location[team, slot] = slot_hints
     
     # "events"
 
@@ -864,6 +1236,9 @@ class Context:
             "hint_points": get_slot_points(self, team, slot)
         }])
 
+    def on_new_location_checks(self, team: int, slot: int, locations: typing.AbstractSet[int]):
+        pass
+
     def on_changed_hints(self, team: int, slot: int):
         key: str = f"_read_hints_{team}_{slot}"
         targets: typing.Set[Client] = set(self.stored_data_notification_clients[key])
@@ -1057,29 +1432,91 @@ def get_status_string(ctx: Context, team: int, tag: str):
     return text
 
 
-def get_received_items(ctx: Context, team: int, player: int, remote_items: bool) -> typing.List[NetworkItem]:
-    return ctx.received_items.setdefault((team, player, remote_items), [])
+def get_slot_received_items(ctx: Context, team: int, player: int) -> ReceivedItems:
+    received_items = ctx.received_items.get((team, player))
+    if received_items is None:
+        received_items = ctx.received_items[team, player] = ReceivedItems()
+    return received_items
+
+
+def get_received_items(ctx: Context, team: int, player: int, remote_items: bool) -> typing.Sequence[NetworkItem]:
+    received_items = get_slot_received_items(ctx, team, player)
+    return received_items if remote_items else received_items.non_remote
 
 
 def get_start_inventory(ctx: Context, player: int, remote_start_inventory: bool) -> typing.List[NetworkItem]:
     return ctx.start_inventory.setdefault(player, []) if remote_start_inventory else []
 
 
+def deliver_soon(ctx: Context):
+    """Delivers the pending new items and team texts once at the end of the current event loop iteration if there is
+    one, to send those of all checks in it at once, or right away otherwise."""
+    if ctx.delivery_scheduled:
+        return
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        deliver_pending(ctx)
+    else:
+        ctx.delivery_scheduled = True
+        loop.call_soon(deliver_pending, ctx)
+
+
+def deliver_pending(ctx: Context):
+    ctx.delivery_scheduled = False
+    deliver_new_items(ctx)
+    deliver_team_texts(ctx)
+
+
 def send_new_items(ctx: Context):
-    for team, clients in ctx.clients.items():
-        for slot, clients in clients.items():
-            for client in clients:
-                if client.no_items:
-                    continue
-                start_inventory = get_start_inventory(ctx, slot, client.remote_start_inventory)
-                items = get_received_items(ctx, team, slot, client.remote_items)
-                if len(start_inventory) + len(items) > client.send_index:
-                    first_new_item = max(0, client.send_index - len(start_inventory))
-                    async_start(ctx.send_msgs(client, [{
-                        "cmd": "ReceivedItems",
-                        "index": client.send_index,
-                        "items": start_inventory[client.send_index:] + items[first_new_item:]}]))
-                    client.send_index = len(start_inventory) + len(items)
+    """Sends the new received items to the clients of the slots in ctx.new_items_receivers, see deliver_soon.
+    Any message sent to such a client before then is preceded by its new items."""
+    deliver_soon(ctx)
+
+
+def pop_new_items_msg(ctx: Context, client: Client, team: int, slot: int) -> typing.Optional[dict]:
+    """Returns the ReceivedItems message of the items the client wasn't sent yet and marks them as sent,
+    or None if there are none."""
+    if client.no_items:
+        return None
+    start_inventory = get_start_inventory(ctx, slot, client.remote_start_inventory)
+    items = get_received_items(ctx, team, slot, client.remote_items)
+    if len(start_inventory) + len(items) <= client.send_index:
+        return None
+    first_new_item = max(0, client.send_index - len(start_inventory))
+    msg = {"cmd": "ReceivedItems",
+           "index": client.send_index,
+           "items": start_inventory[client.send_index:] + items[first_new_item:]}
+    client.send_index = len(start_inventory) + len(items)
+    return msg
+
+
+def deliver_new_items(ctx: Context):
+    receivers, ctx.new_items_receivers = ctx.new_items_receivers, set()
+    for team, slot in receivers:
+        for client in ctx.clients.get(team, {}).get(slot, ()):
+            msg = pop_new_items_msg(ctx, client, team, slot)
+            if msg:
+                async_start(ctx.send_msgs(client, [msg]))
+
+
+def broadcast_team_texts(ctx: Context, team: int, msgs: typing.Iterable[typing.Dict[str, typing.Any]]):
+    """Sends PrintJSON messages to the clients of the team that receive text, see deliver_soon."""
+    ctx.team_texts.setdefault(team, []).extend(msgs)
+    deliver_soon(ctx)
+
+
+def deliver_team_texts(ctx: Context):
+    team_texts, ctx.team_texts = ctx.team_texts, {}
+    for team, msgs in team_texts.items():
+        endpoints = [endpoint for endpoint in itertools.chain.from_iterable(ctx.clients.get(team, {}).values())
+                     if not endpoint.no_text]
+        if not endpoints:
+            continue
+        # split into chunks that are close to compression window of 64K but not too big on the wire
+        # (roughly 1300-2600 bytes after compression depending on repetitiveness)
+        chunks = [ctx.dumper(msgs[start:start + 140]) for start in range(0, len(msgs), 140)]
+        async_start(ctx.broadcast_send_encoded_msgs_list(endpoints, chunks))
 
 
 def update_checked_locations(ctx: Context, team: int, slot: int):
@@ -1123,10 +1560,10 @@ def get_remaining(ctx: Context, team: int, slot: int) -> typing.List[typing.Tupl
 
 def send_items_to(ctx: Context, team: int, target_slot: int, *items: NetworkItem):
     for target in ctx.slot_set(target_slot):
+        ctx.new_items_receivers.add((team, target))
+        received_items = get_slot_received_items(ctx, team, target)
         for item in items:
-            if item.player != target_slot:
-                get_received_items(ctx, team, target, False).append(item)
-            get_received_items(ctx, team, target, True).append(item)
+            received_items.append(item, item.player != target_slot)
 
 
 def register_location_checks(ctx: Context, team: int, slot: int, locations: typing.Iterable[int],
@@ -1153,17 +1590,15 @@ def register_location_checks(ctx: Context, team: int, slot: int, locations: typi
             ctx.logger.info('(Team #%d) %s sent %s to %s (%s)' % (
                 team + 1, ctx.player_names[(team, slot)], ctx.item_names[ctx.slot_info[target_player].game][item_id],
                 ctx.player_names[(team, target_player)], ctx.location_names[ctx.slot_info[slot].game][location]))
-            if len(info_texts) >= 140:
-                # split into chunks that are close to compression window of 64K but not too big on the wire
-                # (roughly 1300-2600 bytes after compression depending on repetitiveness)
-                ctx.broadcast_team(team, info_texts)
-                info_texts.clear()
             info_texts.append(json_format_send_event(new_item, target_player))
-        ctx.broadcast_team(team, info_texts)
+        broadcast_team_texts(ctx, team, info_texts)
         del info_texts
         del sortable
 
         ctx.location_checks[team, slot] |= new_locations
+        if ctx.save_journal:
+            ctx.save_journal.add_location_checks(team, slot, new_locations)
+        ctx.on_new_location_checks(team, slot, new_locations)
         send_new_items(ctx)
         ctx.broadcast(ctx.clients[team][slot], [{
             "cmd": "RoomUpdate",
@@ -1171,7 +1606,7 @@ def register_location_checks(ctx: Context, team: int, slot: int, locations: typi
             "checked_locations": new_locations,  # send back new checks only
         }])
         updated_slots: typing.Set[tuple[int, int]] = set()
-        ctx.recheck_hints(team, slot, updated_slots)
+        ctx.recheck_hints(team, slot, updated_slots, new_locations)
         for hint_team, hint_slot in updated_slots:
             ctx.on_changed_hints(hint_team, hint_slot)
         ctx.save()
@@ -1661,8 +2096,8 @@ class ClientMessageProcessor(CommonCommandProcessor):
             )
             if usable:
                 new_item = NetworkItem(names[item_name], -1, self.client.slot)
-                get_received_items(self.ctx, self.client.team, self.client.slot, False).append(new_item)
-                get_received_items(self.ctx, self.client.team, self.client.slot, True).append(new_item)
+                get_slot_received_items(self.ctx, self.client.team, self.client.slot).append(new_item, True)
+                self.ctx.new_items_receivers.add((self.client.team, self.client.slot))
                 self.ctx.broadcast_text_all(
                     'Cheat console: sending "' + item_name + '" to ' + self.ctx.get_aliased_name(self.client.team,
                                                                                                  self.client.slot),
@@ -1683,6 +2118,7 @@ class ClientMessageProcessor(CommonCommandProcessor):
             hints = {hint.re_check(self.ctx, self.client.team) for hint in
                      self.ctx.hints[self.client.team, self.client.slot]}
             self.ctx.hints[self.client.team, self.client.slot] = hints
+            self.ctx.index_hints(self.client.team, self.client.slot)
             self.ctx.notify_hints(self.client.team, list(hints), recipients=(self.client.slot,))
             self.output(f"A hint costs {self.ctx.get_hint_cost(self.client.slot)} points. "
                         f"You have {points_available} points.")
@@ -1840,7 +2276,7 @@ def get_slot_points(ctx: Context, team: int, slot: int) -> int:
             ctx.get_hint_cost(slot) * ctx.hints_used[team, slot])
 
 
-async def process_client_cmd(ctx: Context, client: Client, args: dict):
+async def process_client_cmd(ctx: Context, client: Client, args: typing.Dict[str, typing.Any]):
     try:
         cmd: str = args["cmd"]
     except:
@@ -1891,6 +2327,7 @@ async def process_client_cmd(ctx: Context, client: Client, args: dict):
             await ctx.send_msgs(client, [{"cmd": "ConnectionRefused", "errors": list(errors)}])
         else:
             team, slot = ctx.connect_names[args['name']]
+            ctx.untag_client(client)
             if client.auth and client.team is not None and client.slot in ctx.clients[client.team]:
                 ctx.clients[team][slot].remove(client)  # re-auth, remove old entry
                 if client.team != team or client.slot != slot:
@@ -1902,6 +2339,7 @@ async def process_client_cmd(ctx: Context, client: Client, args: dict):
             ctx.clients[team][slot].append(client)
             client.version = args['version']
             client.tags = args['tags']
+            ctx.tag_client(client)
             client.no_locations = bool(client.tags & _non_game_messages.keys())
             # set NoText for old PopTracker clients that predate the tag to save traffic
             client.no_text = "NoText" in client.tags or ("PopTracker" in client.tags and client.version < (0, 5, 1))
@@ -1918,7 +2356,7 @@ async def process_client_cmd(ctx: Context, client: Client, args: dict):
             start_inventory = get_start_inventory(ctx, slot, client.remote_start_inventory)
             items = get_received_items(ctx, client.team, client.slot, client.remote_items)
             if (start_inventory or items) and not client.no_items:
-                reply.append({"cmd": 'ReceivedItems', "index": 0, "items": start_inventory + items})
+                reply.append({"cmd": 'ReceivedItems', "index": 0, "items": start_inventory + items[:]})
                 client.send_index = len(start_inventory) + len(items)
             if not client.auth:  # if this was a Re-Connect, don't print to console
                 client.auth = True
@@ -1930,23 +2368,19 @@ async def process_client_cmd(ctx: Context, client: Client, args: dict):
     elif cmd == "GetDataPackage":
         exclusions = args.get("exclusions", [])
         if "games" in args:
+            requested_games = set(args.get("games", []))
             games = {name: game_data for name, game_data in ctx.gamespackage.items()
-                     if name in set(args.get("games", []))}
-            await ctx.send_msgs(client, [{"cmd": "DataPackage",
-                                          "data": {"games": games}}])
+                     if name in requested_games}
+            await ctx.send_encoded_msgs(client, ctx.encode_data_package(games))
         # TODO: remove exclusions behaviour around 0.5.0
         elif exclusions:
             exclusions = set(exclusions)
             games = {name: game_data for name, game_data in ctx.gamespackage.items()
                      if name not in exclusions}
-
-            package = {"games": games}
-            await ctx.send_msgs(client, [{"cmd": "DataPackage",
-                                          "data": package}])
+            await ctx.send_encoded_msgs(client, ctx.encode_data_package(games))
 
         else:
-            await ctx.send_msgs(client, [{"cmd": "DataPackage",
-                                          "data": {"games": ctx.gamespackage}}])
+            await ctx.send_encoded_msgs(client, ctx.encode_data_package(ctx.gamespackage))
 
     elif client.auth:
         if cmd == "ConnectUpdate":
@@ -1963,7 +2397,7 @@ async def process_client_cmd(ctx: Context, client: Client, args: dict):
                     if (items or start_inventory) and not client.no_items:
                         client.send_index = len(start_inventory) + len(items)
                         await ctx.send_msgs(client, [{"cmd": "ReceivedItems", "index": 0,
-                                                      "items": start_inventory + items}])
+                                                      "items": start_inventory + items[:]}])
                     else:
                         client.send_index = 0
                 except (ValueError, TypeError) as err:
@@ -1974,7 +2408,9 @@ async def process_client_cmd(ctx: Context, client: Client, args: dict):
 
             if "tags" in args:
                 old_tags = client.tags
+                ctx.untag_client(client)
                 client.tags = args["tags"]
+                ctx.tag_client(client)
                 if set(old_tags) != set(client.tags):
                     client.no_locations = bool(client.tags & _non_game_messages.keys())
                     client.no_text = "NoText" in client.tags or (
@@ -1991,7 +2427,7 @@ async def process_client_cmd(ctx: Context, client: Client, args: dict):
             if (start_inventory or items) and not client.no_items:
                 client.send_index = len(start_inventory) + len(items)
                 await ctx.send_msgs(client, [{"cmd": "ReceivedItems", "index": 0,
-                                              "items": start_inventory + items}])
+                                              "items": start_inventory + items[:]}])
 
         elif cmd == 'LocationChecks':
             if client.no_locations:
@@ -2135,17 +2571,18 @@ async def process_client_cmd(ctx: Context, client: Client, args: dict):
             client.messageprocessor(args["text"])
 
         elif cmd == "Bounce":
-            games = set(args.get("games", []))
-            tags = set(args.get("tags", []))
             slots = set(args.get("slots", []))
+            for game in set(args.get("games", [])):
+                slots.update(ctx.slots_by_game.get(game, ()))
+            team_clients = ctx.clients[client.team]
+            targets: typing.Set[Client] = set()
+            for slot in slots:
+                targets.update(team_clients.get(slot, ()))
+            for tag in set(args.get("tags", [])):
+                targets.update(ctx.tagged_clients.get((client.team, tag), ()))
             args["cmd"] = "Bounced"
-            msg = ctx.dumper([args])
-
-            for bounceclient in ctx.endpoints:
-                if client.team == bounceclient.team and (ctx.games[bounceclient.slot] in games or
-                                                         set(bounceclient.tags) & tags or
-                                                         bounceclient.slot in slots):
-                    await ctx.send_encoded_msgs(bounceclient, msg)
+            if targets:
+                await ctx.broadcast_send_encoded_msgs(targets, ctx.dumper([args]))
 
         elif cmd == "Get":
             if "keys" not in args or type(args["keys"]) != list:
@@ -2168,16 +2605,20 @@ async def process_client_cmd(ctx: Context, client: Client, args: dict):
                                               "text": 'Set', "original_cmd": cmd}])
                 return
             args["cmd"] = "SetReply"
+            targets = set(ctx.stored_data_notification_clients.get(args["key"], ()))
+            if args.get("want_reply", False):
+                targets.add(client)
             value = ctx.stored_data.get(args["key"], args.get("default", 0))
-            args["original_value"] = copy.copy(value)
+            if targets:
+                # remove, pop and update modify the value in place, so only pay for the copy if anyone gets to see it
+                args["original_value"] = copy.copy(value)
             args["slot"] = client.slot
             for operation in args["operations"]:
                 func = modify_functions[operation["operation"]]
                 value = func(value, operation["value"])
             ctx.stored_data[args["key"]] = args["value"] = value
-            targets = set(ctx.stored_data_notification_clients[args["key"]])
-            if args.get("want_reply", False):
-                targets.add(client)
+            if ctx.save_journal:
+                ctx.save_journal.changed_stored_data.add(args["key"])
             if targets:
                 ctx.broadcast(targets, [args])
             ctx.save()
@@ -3,9 +3,12 @@ from __future__ import annotations
 from collections.abc import Mapping, Sequence
 import typing
 import enum
+import re
 import warnings
 from json import JSONEncoder, JSONDecoder
 
+import orjson
+
 if typing.TYPE_CHECKING:
     from websockets import WebSocketServerProtocol as ServerConnection
 
@@ -135,8 +138,45 @@ _encode = JSONEncoder(
 ).encode
 
 
+def _as_json_values(obj: typing.Any) -> typing.Any:
+    """Turns NamedTuples nested in a NamedTuple into plain tuples, as the json module writes them as arrays."""
+    if isinstance(obj, (tuple, list)):
+        return tuple(_as_json_values(o) for o in obj)
+    if isinstance(obj, dict):
+        return {key: _as_json_values(value) for key, value in obj.items()}
+    return obj
+
+
+def _encode_default(obj: typing.Any) -> typing.Any:
+    if type(obj) is NetworkItem:  # by far the most common one, so skip the generic conversion
+        return {"item": obj.item, "location": obj.location, "player": obj.player, "flags": obj.flags,
+                "class": "NetworkItem"}
+    if isinstance(obj, tuple) and hasattr(obj, "_fields"):  # NamedTuple is not actually a parent class
+        data = {field: value if isinstance(value, (str, int, float)) or value is None else _as_json_values(value)
+                for field, value in zip(obj._fields, obj)}
+        data["class"] = obj.__class__.__name__
+        return data
+    if isinstance(obj, (set, frozenset)):
+        return tuple(obj)
+    raise TypeError(f"Object of type {obj.__class__.__name__} is not JSON serializable")
+
+
+# orjson uses a different notation than the json module for very large and small floats, such as 1e16 for 1e+16,
+# 1e-7 for 1e-07 and 0.00001 for 1e-05. Matches are rare in practice, as are matching strings.
+# Non-finite floats are written as null by orjson, which unlike the NaN and Infinity of the json module is valid JSON.
+_orjson_differences = re.compile(rb"\de(?:\d|-\d(?!\d))|(?<![\d.])0\.0000")
+
+
 def encode(obj: typing.Any) -> str:
-    return _encode(_scan_for_TypedTuples(obj))
+    try:
+        data = orjson.dumps(obj, default=_encode_default, option=orjson.OPT_NON_STR_KEYS)
+    except orjson.JSONEncodeError:
+        # orjson does not handle everything json does, such as integers beyond 64 bit
+        return _encode(_scan_for_TypedTuples(obj))
+    if _orjson_differences.search(data):
+        # encoded the same as by the json module, as clients may rely on it, such as NaN in the data storage
+        return _encode(_scan_for_TypedTuples(obj))
+    return data.decode("utf-8")
 
 
 def get_any_version(data: dict) -> Version:
@@ -427,6 +467,21 @@ class _LocationStore(dict, typing.MutableMapping[int, typing.Dict[int, typing.Tu
         if len(self.get(0, {})):
             raise ValueError("Invalid player id 0 for location")
 
+        self._spheres: typing.Dict[typing.Tuple[int, int], int] = {}
+
+    def set_spheres(self, spheres: typing.Sequence[typing.Dict[int, typing.Set[int]]]) -> None:
+        for sphere_index, sphere in enumerate(spheres):
+            for player, locations in sphere.items():
+                player_locations = self.get(player, {})
+                for location_id in locations:
+                    if location_id in player_locations:
+                        self._spheres[player, location_id] = sphere_index
+
+    def get_sphere(self, slot: int, location_id: int) -> int:
+        if location_id not in self[slot]:
+            raise KeyError(f"No location {location_id} for player {slot}")
+        return self._spheres.get((slot, location_id), -1)
+
     def find_item(self, slots: typing.Set[int], seeked_item_id: int
                   ) -> typing.Generator[typing.Tuple[int, int, int, int, int], None, None]:
         for finding_player, check_data in self.items():
@@ -43,6 +43,9 @@ app.config["JOB_TIME"] = 600
 # memory limit for generator processes in bytes
 app.config["GENERATOR_MEMORY_LIMIT"] = 4294967296
 app.config['SESSION_PERMANENT'] = True
+# size in bytes of the decompressed multidata of the seeds trackers keep decoded in memory,
+# which estimates the memory the decoded multidata takes
+app.config["TRACKER_MULTIDATA_CACHE_SIZE"] = 64 * 1024 * 1024
 
 # waitress uses one thread for I/O, these are for processing of views that then get sent
 # archipelago.gg uses gunicorn + nginx; ignoring this option
@@ -2,12 +2,14 @@ from datetime import datetime, timezone
 from typing import Any, TypedDict
 from uuid import UUID
 
-from flask import abort
+from flask import abort, request
+from pony.orm import select
 
 from NetUtils import ClientStatus, Hint, NetworkItem, SlotType
+from Utils import restricted_loads
 from WebHostLib import cache
 from WebHostLib.api import api_endpoints
-from WebHostLib.models import Room
+from WebHostLib.models import Room, TrackerEvent
 from WebHostLib.tracker import TrackerData
 
 
@@ -239,3 +241,32 @@ def tracker_slot_data(tracker: UUID) -> list[PlayerSlotData]:
         break
 
     return slot_data
+
+
+@api_endpoints.route("/tracker/<suuid:tracker>/events")
+def tracker_events(tracker: UUID) -> dict[str, Any]:
+    """
+    Outputs json data to <root_path>/api/tracker/<id of current session tracker>/events?after=<event id>.
+
+    :param tracker: UUID of current session tracker.
+
+    :return: The changes published by the room after the given event id, and the id of the last of them. Without an
+        event id, no changes and the id of the room's last published changes.
+    """
+    room: Room | None = Room.get(tracker=tracker)
+    if not room:
+        abort(404)
+    last_id: int = select(tracker_event.id for tracker_event in TrackerEvent if tracker_event.room == room).max() or 0
+    after = request.args.get("after", type=int)
+    if after is None:
+        return {"events": [], "id": last_id}
+    # the last changes of a room are never pruned, so a missing event means that the changes after it may be gone
+    if after and not TrackerEvent.exists(id=after, room=room):
+        abort(410)
+
+    events: list[dict[str, Any]] = []
+    for tracker_event in select(tracker_event for tracker_event in TrackerEvent
+                                if tracker_event.room == room and tracker_event.id > after
+                                ).order_by(TrackerEvent.id):
+        events.extend(restricted_loads(tracker_event.events))
+    return {"events": events, "id": max(after, last_id)}
@@ -9,7 +9,7 @@ from threading import Event, Thread
 from typing import Any
 from uuid import UUID
 
-from pony.orm import db_session, select, commit, PrimaryKey
+from pony.orm import db_session, exists, select, commit, PrimaryKey
 
 from Utils import restricted_loads
 from .locker import Locker, AlreadyRunningException
@@ -113,6 +113,18 @@ def cleanup():
         logging.info(f"{rooms} Rooms, {seeds} Seeds and {slots} Slots have been deleted.")
 
 
+def prune_tracker_events():
+    """delete the tracker events that are too old to be requested, except for the last one of each room, which the
+    events api uses to tell whether a request missed any deleted events"""
+    expired = datetime.utcnow() - timedelta(seconds=TRACKER_EVENT_LIFETIME_IN_SECONDS)
+    with db_session:
+        event_ids = select(event.id for event in TrackerEvent if event.time < expired and
+                           exists(newer for newer in TrackerEvent if newer.room == event.room and newer.id > event.id)
+                           )[:]
+        if event_ids:
+            TrackerEvent.select(lambda event: event.id in event_ids).delete(bulk=True)
+
+
 def autohost(config: dict):
     def keep_running():
         stop_event = _stop_event
@@ -125,15 +137,28 @@ def autohost(config: dict):
                     hosters.append(hoster)
                     hoster.start()
 
+                # the first query looks at all recently active rooms, after that only at rooms with new activity.
+                # Rooms stay tracked until their timeout ran out, so rooms that stopped early get started again.
+                active_since = datetime.utcnow() - timedelta(days=3)
+                active_rooms: typing.Dict[UUID, typing.Tuple[datetime, int]] = {}
+                next_pruning = datetime.utcnow()
                 while not stop_event.wait(0.1):
+                    # also removes the events of rooms that stopped publishing them
+                    if datetime.utcnow() >= next_pruning:
+                        prune_tracker_events()
+                        next_pruning = datetime.utcnow() + timedelta(seconds=60)
                     with db_session:
-                        rooms = select(
-                            room for room in Room if
-                            room.last_activity >= datetime.utcnow() - timedelta(days=3))
-                        for room in rooms:
-                            # we have to filter twice, as the per-room timeout can't currently be PonyORM transpiled.
-                            if room.last_activity >= datetime.utcnow() - timedelta(seconds=room.timeout + 5):
-                                hosters[room.id.int % len(hosters)].start_room(room.id)
+                        now = datetime.utcnow()
+                        for room in select(room for room in Room if room.last_activity >= active_since):
+                            active_rooms[room.id] = room.last_activity, room.timeout
+                        # activity may be committed some time after it was timestamped, so look back a bit further
+                        active_since = now - timedelta(seconds=30)
+                    now = datetime.utcnow()
+                    for room_id, (last_activity, timeout) in tuple(active_rooms.items()):
+                        if last_activity >= now - timedelta(seconds=timeout + 5):
+                            hosters[room_id.int % len(hosters)].start_room(room_id)
+                        else:
+                            del active_rooms[room_id]
 
         except AlreadyRunningException:
             logging.info("Autohost reports as already running, not starting another.")
@@ -141,14 +166,29 @@ def autohost(config: dict):
     Thread(target=keep_running, name="AP_Autohost").start()
 
 
+def get_generator_context() -> multiprocessing.context.BaseContext:
+    """Returns the multiprocessing context to start generators with.
+    Where available, generators are forked from a server process that has imported the worlds once,
+    instead of spawning a process that has to import them again for every generator."""
+    if "forkserver" not in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context()
+    context = multiprocessing.get_context("forkserver")
+    context.set_forkserver_preload(["__main__", "worlds", __name__, "WebHostLib.generator_preload"])
+    return context
+
+
 def autogen(config: dict):
     def keep_running():
         stop_event = _stop_event
         try:
             with Locker("autogen"):
 
-                with multiprocessing.Pool(config["GENERATORS"], initializer=init_generator,
-                                          initargs=(config,), maxtasksperchild=10) as generator_pool:
+                generator_context = get_generator_context()
+                # a generator forked from the fork server starts in about as little time as it takes to bind the
+                # database, so it is replaced after every generation, which returns all the memory it grew by
+                maxtasksperchild = 1 if generator_context.get_start_method() == "forkserver" else 10
+                with generator_context.Pool(config["GENERATORS"], initializer=init_generator, initargs=(config,),
+                                            maxtasksperchild=maxtasksperchild) as generator_pool:
                     job_time = config["JOB_TIME"]
                     with db_session:
                         to_start = select(generation for generation in Generation if generation.state == STATE_STARTED)
@@ -225,6 +265,7 @@ class MultiworldInstance():
         self.process = None
 
 
-from .models import Room, Generation, STATE_QUEUED, STATE_STARTED, STATE_ERROR, db, Seed, Slot
+from .models import Room, Generation, STATE_QUEUED, STATE_STARTED, STATE_ERROR, db, Seed, Slot, TrackerEvent, \
+    TRACKER_EVENT_LIFETIME_IN_SECONDS
 from .customserver import run_server_process, get_static_server_data
 from .generate import gen_game
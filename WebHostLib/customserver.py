@@ -2,6 +2,7 @@ from __future__ import annotations
 
 import asyncio
 import collections
+import concurrent.futures
 import datetime
 import functools
 import logging
@@ -15,7 +16,7 @@ import typing
 import sys
 
 import websockets
-from pony.orm import commit, db_session, select
+from pony.orm import db_session, select
 
 import Utils
 
@@ -25,7 +26,7 @@ from MultiServer import (
 )
 from Utils import restricted_loads, cache_argsless
 from .locker import Locker
-from .models import Command, GameDataPackage, Room, db
+from .models import Command, GameDataPackage, Room, TrackerEvent, db
 
 
 class CustomClientMessageProcessor(ClientMessageProcessor):
@@ -74,6 +75,11 @@ class WebHostContext(Context):
         self.main_loop = asyncio.get_running_loop()
         self.video = {}
         self.tags = ["AP", "WebHost"]
+        # changes not yet published as tracker events
+        self.tracker_checks: typing.Dict[typing.Tuple[int, int], typing.Set[int]] = {}
+        self.tracker_hints: typing.Set[typing.Tuple[int, int]] = set()
+        self.tracker_statuses: typing.Set[typing.Tuple[int, int]] = set()
+        self.tracker_received_counts: typing.Dict[typing.Tuple[int, int], int] = {}
 
     def __del__(self):
         try:
@@ -89,19 +95,36 @@ class WebHostContext(Context):
             setattr(self, key, value)
         self.non_hintable_names = collections.defaultdict(frozenset, self.non_hintable_names)
 
-    def listen_to_db_commands(self):
-        cmdprocessor = DBCommandProcessor(self)
-
-        while not self.exit_event.is_set():
-            with db_session:
-                commands = select(command for command in Command if command.room.id == self.room_id)
-                if commands:
-                    for command in commands:
-                        self.main_loop.call_soon_threadsafe(cmdprocessor, command.commandtext)
-                        command.delete()
-                    commit()
-            del commands
-            time.sleep(5)
+    def on_new_location_checks(self, team: int, slot: int, locations: typing.AbstractSet[int]):
+        self.tracker_checks.setdefault((team, slot), set()).update(locations)
+
+    def on_changed_hints(self, team: int, slot: int):
+        super(WebHostContext, self).on_changed_hints(team, slot)
+        self.tracker_hints.add((team, slot))
+
+    def on_client_status_change(self, team: int, slot: int):
+        super(WebHostContext, self).on_client_status_change(team, slot)
+        self.tracker_statuses.add((team, slot))
+
+    async def pop_tracker_events(self) -> typing.List[typing.Dict[str, typing.Any]]:
+        """Returns the changes since the last call as events of the tracker event api."""
+        events: typing.List[typing.Dict[str, typing.Any]] = []
+        for (team, slot), items in self.received_items.items():
+            start = self.tracker_received_counts.get((team, slot), 0)
+            if len(items) > start:
+                events.append({"type": "items", "team": team, "player": slot, "index": start, "items": items[start:]})
+                self.tracker_received_counts[team, slot] = len(items)
+        for (team, slot), locations in self.tracker_checks.items():
+            events.append({"type": "checks", "team": team, "player": slot, "locations": sorted(locations)})
+        for team, slot in self.tracker_hints:
+            events.append({"type": "hints", "team": team, "player": slot, "hints": list(self.hints[team, slot])})
+        for team, slot in self.tracker_statuses:
+            events.append({"type": "status", "team": team, "player": slot,
+                           "status": self.client_game_state[team, slot]})
+        self.tracker_checks = {}
+        self.tracker_hints = set()
+        self.tracker_statuses = set()
+        return events
 
     @db_session
     def load(self, room_id: int):
@@ -157,8 +180,8 @@ class WebHostContext(Context):
                 savegame_data = Room.get(id=self.room_id).multisave
                 if savegame_data:
                     self.set_save(restricted_loads(Room.get(id=self.room_id).multisave))
+            self.tracker_received_counts = {key: len(items) for key, items in self.received_items.items()}
             self._start_async_saving(atexit_save=False)
-        threading.Thread(target=self.listen_to_db_commands, daemon=True).start()
 
     @db_session
     def _save(self, exit_save: bool = False) -> bool:
@@ -176,6 +199,77 @@ class WebHostContext(Context):
         return d
 
 
+class DBCommandDispatcher(threading.Thread):
+    """Passes the commands in the database to the rooms of a server process and publishes their tracker events,
+    every few seconds for all the rooms at once."""
+    interval = 5
+    chunk_size = 500  # room IDs per query, to stay below the parameter limits of databases
+
+    def __init__(self):
+        super().__init__(name="DBCommandDispatcher", daemon=True)
+        self.lock = threading.Lock()
+        self.rooms: typing.Dict[typing.Any, typing.Tuple[WebHostContext, DBCommandProcessor]] = {}
+        self.tracker_events: typing.Optional[
+            concurrent.futures.Future[typing.Dict[typing.Any, typing.List[typing.Dict[str, typing.Any]]]]] = None
+
+    def add_room(self, ctx: WebHostContext):
+        with self.lock:
+            self.rooms[ctx.room_id] = ctx, DBCommandProcessor(ctx)
+
+    def remove_room(self, ctx: WebHostContext):
+        with self.lock:
+            self.rooms.pop(ctx.room_id, None)
+
+    def run(self):
+        while 1:
+            time.sleep(self.interval)
+            with self.lock:
+                rooms = dict(self.rooms)
+            if rooms:
+                try:
+                    self.dispatch(rooms)
+                except Exception as e:
+                    logging.exception(e)
+
+    def dispatch(self, rooms: typing.Dict[typing.Any, typing.Tuple[WebHostContext, DBCommandProcessor]]):
+        room_ids = list(rooms)
+        with db_session:
+            for start in range(0, len(room_ids), self.chunk_size):
+                chunk = room_ids[start:start + self.chunk_size]
+                for command in select(command for command in Command if command.room.id in chunk):
+                    ctx, cmdprocessor = rooms[command.room.id]
+                    ctx.main_loop.call_soon_threadsafe(cmdprocessor, command.commandtext)
+                    command.delete()
+
+        async def pop_tracker_events() -> typing.Dict[typing.Any, typing.List[typing.Dict[str, typing.Any]]]:
+            room_events: typing.Dict[typing.Any, typing.List[typing.Dict[str, typing.Any]]] = {}
+            for room_id, (ctx, _) in rooms.items():
+                try:
+                    room_events[room_id] = await ctx.pop_tracker_events()
+                except Exception as e:
+                    ctx.logger.exception(e)
+            return room_events
+
+        # a busy event loop may take a while to get to it, the events are then picked up by a later dispatch
+        if self.tracker_events is None:
+            main_loop = next(iter(rooms.values()))[0].main_loop
+            self.tracker_events = asyncio.run_coroutine_threadsafe(pop_tracker_events(), main_loop)
+        try:
+            room_events = self.tracker_events.result(timeout=self.interval)
+        except concurrent.futures.TimeoutError:
+            logging.warning("Tracker events were not collected in time, retrying with the next dispatch.")
+            return
+        finally:
+            if self.tracker_events.done():
+                self.tracker_events = None
+        with db_session:
+            for room_id, events in room_events.items():
+                room = Room.get(id=room_id) if events else None
+                if room:
+                    # Does not use Utils.restricted_dumps because the events only hold what a save holds
+                    TrackerEvent(room=room, events=pickle.dumps(events))
+
+
 def get_random_port():
     return random.randint(49152, 65535)
 
@@ -275,6 +369,8 @@ def run_server_process(name: str, ponyconfig: dict, static_server_data: dict,
     gc.collect()  # free intermediate objects used during setup
 
     loop = asyncio.get_event_loop()
+    dispatcher = DBCommandDispatcher()
+    dispatcher.start()
 
     async def start_room(room_id):
         with Locker(f"RoomLocker {room_id}"):
@@ -283,6 +379,7 @@ def run_server_process(name: str, ponyconfig: dict, static_server_data: dict,
                 ctx = WebHostContext(static_server_data, logger)
                 ctx.load(room_id)
                 ctx.init_save()
+                dispatcher.add_room(ctx)
                 assert ctx.server is None
                 try:
                     ctx.server = websockets.serve(
@@ -340,6 +437,7 @@ def run_server_process(name: str, ponyconfig: dict, static_server_data: dict,
                     setattr(asyncio.current_task(), "save", None)
             finally:
                 try:
+                    dispatcher.remove_room(ctx)
                     ctx.save_dirty = False  # make sure the saving thread does not write to DB after final wakeup
                     ctx.exit_event.set()  # make sure the saving thread stops at some point
                     # NOTE: async saving should probably be an async task and could be merged with shutdown_task
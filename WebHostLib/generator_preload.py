@@ -0,0 +1,9 @@
+"""
+Imported last by the fork server that generators are forked from, see autolauncher.get_generator_context.
+Everything imported before is shared with the generators copy-on-write, so it is frozen here, in the fork server,
+to keep the garbage collector of every generator from touching, and thereby copying, it.
+"""
+import gc
+
+gc.collect()
+gc.freeze()
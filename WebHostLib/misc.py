@@ -12,6 +12,7 @@ from werkzeug.utils import secure_filename
 from worlds.AutoWorld import AutoWorldRegister, World
 from . import app, cache
 from .markdown import render_markdown
+from .stats import record_game_stats
 from .models import Seed, Room, Command, UUID, uuid4
 from Utils import title_sorted
 
@@ -169,6 +170,7 @@ def new_room(seed: UUID):
     if not seed:
         abort(404)
     room = Room(seed=seed, owner=session["_id"], tracker=uuid4())
+    record_game_stats(seed.slots)
     commit()
     return redirect(url_for("host_room", room=room.id))
 
@@ -1,4 +1,4 @@
-from datetime import datetime
+from datetime import date, datetime
 from uuid import UUID, uuid4
 from pony.orm import Database, PrimaryKey, Required, Set, Optional, buffer, LongStr
 
@@ -8,6 +8,9 @@ STATE_QUEUED = 0
 STATE_STARTED = 1
 STATE_ERROR = -1
 
+# how long rooms keep the events of the tracker event api
+TRACKER_EVENT_LIFETIME_IN_SECONDS = 600
+
 
 class Slot(db.Entity):
     id = PrimaryKey(int, auto=True)
@@ -31,6 +34,14 @@ class Room(db.Entity):
     tracker = Optional(UUID, index=True)
     # Port special value -1 means the server errored out. Another attempt can be made with a page refresh
     last_port = Optional(int, default=lambda: 0)
+    tracker_events = Set('TrackerEvent', cascade_delete=True)
+
+
+class TrackerEvent(db.Entity):
+    id = PrimaryKey(int, auto=True)
+    room = Required(Room, index=True)
+    time = Required(datetime, default=lambda: datetime.utcnow(), index=True)
+    events = Required(bytes)  # pickled list of event dicts
 
 
 class Seed(db.Entity):
@@ -61,3 +72,11 @@ class Generation(db.Entity):
 class GameDataPackage(db.Entity):
     checksum = PrimaryKey(str)
     data = Required(bytes)
+
+
+class GameStat(db.Entity):
+    """Number of slots of a game in the rooms created on a day, maintained on room creation for the stats page."""
+    day = Required(date)
+    game = Required(str)
+    PrimaryKey(day, game)
+    slots = Required(int, default=0)
@@ -2,6 +2,7 @@ from collections import Counter, defaultdict
 from colorsys import hsv_to_rgb
 from datetime import datetime, timedelta, date
 from math import tau
+from typing import Iterable
 
 from bokeh.colors import RGB
 from bokeh.embed import components
@@ -12,24 +13,43 @@ from flask import render_template
 from pony.orm import select
 
 from . import app, cache
-from .models import Room
+from .models import GameStat, Room, Slot
 
 PLOT_WIDTH = 600
 
 
+def record_game_stats(slots: Iterable[Slot]) -> None:
+    """Adds the slots of a new room to today's per-game counts.
+    Meant to be called in the db_session that creates the room, so both are committed together."""
+    today = datetime.utcnow().date()
+    for game, count in Counter(slot.game for slot in slots).items():
+        stat = GameStat.get(day=today, game=game)
+        if stat:
+            stat.slots += count
+        else:
+            GameStat(day=today, game=game, slots=count)
+
+
 def get_db_data(known_games: set[str]) -> tuple[Counter[str], defaultdict[date, dict[str, int]]]:
     games_played: defaultdict[date, dict[str, int]] = defaultdict(Counter)
     total_games: Counter[str] = Counter()
     cutoff = date.today() - timedelta(days=30)
+
+    def add(day: date, game: str, slots: int) -> None:
+        if game not in known_games:
+            game = "Other"
+        total_games[game] += slots
+        games_played[day][game] += slots
+
+    for day, game, slots in select((stat.day, stat.game, stat.slots) for stat in GameStat if stat.day >= cutoff):
+        add(day, game, slots)
+    # the days before GameStat was recorded are counted from the rooms created on them
+    first_day = select(stat.day for stat in GameStat).min()
+    until = datetime.combine(first_day, datetime.min.time()) if first_day else datetime.utcnow()
     room: Room
-    for room in select(room for room in Room if room.creation_time >= cutoff):
+    for room in select(room for room in Room if room.creation_time >= cutoff and room.creation_time < until):
         for slot in room.seed.slots:
-            if slot.game in known_games:
-                current_game = slot.game
-            else:
-                current_game = "Other"
-            total_games[current_game] += 1
-            games_played[room.creation_time.date()][current_game] += 1
+            add(room.creation_time.date(), slot.game, 1)
     return total_games, games_played
 
 
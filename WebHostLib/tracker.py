@@ -1,5 +1,8 @@
 import datetime
 import collections
+import threading
+import weakref
+import zlib
 from dataclasses import dataclass
 from typing import Any, Callable, Dict, List, Optional, Set, Tuple, NamedTuple, Counter
 from uuid import UUID
@@ -40,6 +43,80 @@ def _cache_results(func: Callable) -> Callable:
     return method_wrapper
 
 
+class _IDToName(Dict[int, str]):
+    """The names of the IDs of a game, which looks up unknown IDs as a placeholder name without adding them,
+    as it is shared between the threads of requests."""
+    __slots__ = ("unknown",)
+
+    def __init__(self, names: Dict[int, str], unknown: str):
+        super().__init__(names)
+        self.unknown = unknown
+
+    def __missing__(self, code: int) -> str:
+        return self.unknown.format(code)
+
+
+class _GameLookups:
+    """Lookups between the IDs and names of a game's items and locations, shared by all seeds using its data package."""
+    __slots__ = ("item_id_to_name", "location_id_to_name", "item_name_to_id", "location_name_to_id", "__weakref__")
+
+    def __init__(self, game_package: Dict[str, Any]):
+        self.item_id_to_name: Dict[int, str] = _IDToName({
+            id: name for name, id in game_package["item_name_to_id"].items()}, "Unknown Item (ID: {})")
+        self.location_id_to_name: Dict[int, str] = _IDToName({
+            id: name for name, id in game_package["location_name_to_id"].items()}, "Unknown Location (ID: {})")
+        self.item_name_to_id: Dict[str, int] = game_package["item_name_to_id"]
+        self.location_name_to_id: Dict[str, int] = game_package["location_name_to_id"]
+
+
+class _SeedData(NamedTuple):
+    multidata: Dict[str, Any]
+    game_lookups: Dict[str, _GameLookups]
+    size: int
+    """size of the decompressed multidata, as an estimate of the memory the decoded multidata takes"""
+
+
+_game_lookups: "weakref.WeakValueDictionary[str, _GameLookups]" = weakref.WeakValueDictionary()
+_seed_data: "collections.OrderedDict[UUID, _SeedData]" = collections.OrderedDict()
+_seed_data_size = 0
+_seed_data_lock = threading.Lock()
+
+
+def _get_seed_data(room: Room) -> _SeedData:
+    """Returns the decoded multidata of the room's seed with the lookups of its games.
+    The most recently used ones are kept for other requests,
+    up to TRACKER_MULTIDATA_CACHE_SIZE bytes of decompressed multidata."""
+    global _seed_data_size
+    seed_id: UUID = room.seed.id
+    with _seed_data_lock:
+        seed_data = _seed_data.get(seed_id)
+        if seed_data:
+            _seed_data.move_to_end(seed_id)
+            return seed_data
+
+    # does not use Context.decompress to keep the size of the pickle, the format version was checked on upload
+    pickled_multidata = zlib.decompress(room.seed.multidata[1:])
+    multidata = restricted_loads(pickled_multidata)
+    game_lookups: Dict[str, _GameLookups] = {}
+    for game, game_package in multidata["datapackage"].items():
+        with _seed_data_lock:
+            lookups = _game_lookups.get(game_package["checksum"])
+        if lookups is None:
+            lookups = _GameLookups(restricted_loads(GameDataPackage.get(checksum=game_package["checksum"]).data))
+            with _seed_data_lock:
+                _game_lookups[game_package["checksum"]] = lookups
+        game_lookups[game] = lookups
+    seed_data = _SeedData(multidata, game_lookups, len(pickled_multidata))
+
+    with _seed_data_lock:
+        if seed_id not in _seed_data:
+            _seed_data[seed_id] = seed_data
+            _seed_data_size += seed_data.size
+            while _seed_data and _seed_data_size > app.config["TRACKER_MULTIDATA_CACHE_SIZE"]:
+                _seed_data_size -= _seed_data.popitem(last=False)[1].size
+    return seed_data
+
+
 @dataclass
 class TrackerData:
     """A helper dataclass that is instantiated each time an HTTP request comes in for tracker data.
@@ -55,7 +132,8 @@ class TrackerData:
     def __init__(self, room: Room):
         """Initialize a new RoomMultidata object for the current room."""
         self.room = room
-        self._multidata = Context.decompress(room.seed.multidata)
+        seed_data = _get_seed_data(room)
+        self._multidata = seed_data.multidata
         self._multisave = restricted_loads(room.multisave) if room.multisave else {}
         self._tracker_cache = {}
 
@@ -69,16 +147,13 @@ class TrackerData:
         self.location_id_to_name: Dict[str, Dict[int, str]] = KeyedDefaultDict(lambda game_name: {
             game_name: KeyedDefaultDict(lambda code: f"Unknown Game {game_name} - Location (ID: {code})")
         })
-        for game, game_package in self._multidata["datapackage"].items():
-            game_package = restricted_loads(GameDataPackage.get(checksum=game_package["checksum"]).data)
-            self.item_id_to_name[game] = KeyedDefaultDict(lambda code: f"Unknown Item (ID: {code})", {
-                id: name for name, id in game_package["item_name_to_id"].items()})
-            self.location_id_to_name[game] = KeyedDefaultDict(lambda code: f"Unknown Location (ID: {code})", {
-                id: name for name, id in game_package["location_name_to_id"].items()})
+        for game, lookups in seed_data.game_lookups.items():
+            self.item_id_to_name[game] = lookups.item_id_to_name
+            self.location_id_to_name[game] = lookups.location_id_to_name
 
             # Normal lookup tables as well.
-            self.item_name_to_id[game] = game_package["item_name_to_id"]
-            self.location_name_to_id[game] = game_package["location_name_to_id"]
+            self.item_name_to_id[game] = lookups.item_name_to_id
+            self.location_name_to_id[game] = lookups.location_name_to_id
 
     def get_seed_name(self) -> str:
         """Retrieves the seed name."""
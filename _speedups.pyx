@@ -13,7 +13,7 @@ import warnings
 from cpython cimport PyObject
 from typing import Any, Dict, Iterable, Iterator, Generator, Sequence, Tuple, TypeVar, Union, Set, List, TYPE_CHECKING
 from cymem.cymem cimport Pool
-from libc.stdint cimport int64_t, uint32_t
+from libc.stdint cimport int32_t, int64_t, uint32_t
 from collections import defaultdict
 
 cdef extern from *:
@@ -27,6 +27,7 @@ cdef extern from *:
 ctypedef uint32_t ap_player_t  # on AMD64 this is faster (and smaller) than 64bit ints
 ctypedef uint32_t ap_flags_t
 ctypedef int64_t ap_id_t
+ctypedef int32_t ap_sphere_t
 
 cdef ap_player_t MAX_PLAYER_ID = 1000000  # limit the size of indexing array
 cdef size_t INVALID_SIZE = <size_t>(-1)  # this is all 0xff... adding 1 results in 0, but it's not negative
@@ -62,6 +63,7 @@ cdef struct LocationEntry:
     ap_player_t receiver
     ap_id_t item
     ap_flags_t flags
+    ap_sphere_t sphere  # -1 if not in any sphere
 
 
 cdef struct IndexEntry:
@@ -168,6 +170,7 @@ cdef class LocationStore:
                 self.entries[i].receiver = data[1]
                 if len(data) > 2:
                     self.entries[i].flags = data[2]  # initialized to 0 during alloc
+                self.entries[i].sphere = -1
                 # Ignoring extra data. warn?
                 self.sender_index[sender].count += 1
                 i += 1
@@ -215,6 +218,30 @@ cdef class LocationStore:
         return self._items
 
     # specialized accessors
+    def set_spheres(self, spheres: Sequence[Dict[int, Set[int]]]) -> None:
+        """Sets the sphere of each location in the spheres, ignoring locations that are not in the store."""
+        cdef LocationEntry* entry
+        cdef PlayerLocationProxy proxy
+        for sphere_index, sphere in enumerate(spheres):
+            for player, locations in sphere.items():
+                if player < 1 or player >= self.sender_index_size:
+                    continue
+                proxy = <PlayerLocationProxy>self._raw_proxies[player]
+                for location in locations:
+                    entry = proxy._get(location)
+                    if entry:
+                        entry.sphere = sphere_index
+
+    def get_sphere(self, slot: int, location: int) -> int:
+        """Returns the sphere of the location, or -1 if it is not in any sphere."""
+        cdef size_t sender = slot  # NOTE: this may raise TypeError
+        if sender < 1 or sender >= self.sender_index_size:
+            raise KeyError(slot)
+        cdef LocationEntry* entry = (<PlayerLocationProxy>self._raw_proxies[sender])._get(location)
+        if not entry:
+            raise KeyError(f"No location {location} for player {slot}")
+        return entry.sphere
+
     def find_item(self, slots: Set[int], seeked_item_id: int) -> Generator[Tuple[int, int, int, int, int], None, None]:
         cdef ap_id_t item = seeked_item_id
         cdef ap_player_t receiver
@@ -5,3 +5,7 @@ if __name__ == "__main__":
     load_worlds.run_load_worlds_benchmark()
     import locations
     locations.run_locations_benchmark()
+    import encode
+    encode.run_encode_benchmark()
+    import rule_dependency_tracking
+    rule_dependency_tracking.run_rule_dependency_tracking_benchmark()
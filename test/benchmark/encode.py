@@ -0,0 +1,59 @@
+def run_encode_benchmark() -> None:
+    """Run a benchmark of NetUtils.encode against the previous encoder on typical server messages."""
+    import logging
+    import typing
+    import warnings
+    from random import Random
+
+    from time_it import TimeIt
+
+    from Utils import init_logging
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+
+        from MultiServer import json_format_send_event
+        from NetUtils import NetworkItem, NetworkPlayer, NetworkSlot, SlotType, _encode, _scan_for_TypedTuples, encode
+
+    init_logging("Benchmark Runner")
+    logger = logging.getLogger("Benchmark")
+
+    iterations = 100
+    r = Random()
+    r.seed(0)
+    players = range(1, 101)
+
+    def random_item() -> NetworkItem:
+        return NetworkItem(r.randint(1000, 1999), r.randint(1000, 1999), r.choice(players),
+                           r.choice((0, 0, 0, 0, 0, 0, 0, 1, 2, 3)))
+
+    messages: typing.Dict[str, typing.List[dict]] = {
+        "ReceivedItems": [{"cmd": "ReceivedItems", "index": 0, "items": [random_item() for _ in range(1000)]}],
+        "Connected": [{
+            "cmd": "Connected", "team": 0, "slot": 1,
+            "players": [NetworkPlayer(0, player, f"Player{player}", f"Player{player}") for player in players],
+            "missing_locations": [r.randint(1000, 1999) for _ in range(500)],
+            "checked_locations": [r.randint(1000, 1999) for _ in range(500)],
+            "slot_info": {player: NetworkSlot(f"Player{player}", "Archipelago", SlotType.player) for player in players},
+            "hint_points": 0,
+        }],
+        "PrintJSON": [json_format_send_event(random_item(), 1) for _ in range(140)],
+    }
+
+    def previous_encode(obj: typing.Any) -> str:
+        return _encode(_scan_for_TypedTuples(obj))
+
+    for name, msgs in messages.items():
+        assert previous_encode(msgs) == encode(msgs), f"{name} is encoded differently"
+        with TimeIt(f"{iterations} previous encodes of {name}", logger):
+            for _ in range(iterations):
+                previous_encode(msgs)
+        with TimeIt(f"{iterations} encodes of {name}", logger):
+            for _ in range(iterations):
+                encode(msgs)
+
+
+if __name__ == "__main__":
+    import path_change
+    path_change.change_home()
+    run_encode_benchmark()
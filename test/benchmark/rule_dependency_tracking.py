@@ -0,0 +1,76 @@
+import typing
+
+
+def run_rule_dependency_tracking_benchmark(games: typing.Optional[typing.Iterable[str]] = None, players: int = 1,
+                                           iterations: int = 3) -> None:
+    """
+    Run a benchmark of filling a multiworld of each game with and without World.rule_dependency_tracking.
+
+    :param games: The games to benchmark, all games if None.
+    :param players: The number of players of the game in each multiworld.
+    :param iterations: The number of multiworlds to fill with each setting, with seeds counting up from 0.
+    """
+    import argparse
+    import gc
+    import logging
+
+    from time_it import TimeIt
+
+    from Utils import init_logging
+    from BaseClasses import CollectionState, MultiWorld
+    from worlds import AutoWorld
+    from worlds.AutoWorld import call_all
+    from Fill import distribute_items_restrictive
+
+    init_logging("Benchmark Runner")
+    logger = logging.getLogger("Benchmark")
+    gen_steps = ("generate_early", "create_regions", "create_items", "set_rules", "connect_entrances",
+                 "generate_basic", "pre_fill")
+
+    def setup_multiworld(world_type: typing.Type[AutoWorld.World], seed: int, tracking: bool) -> MultiWorld:
+        multiworld = MultiWorld(players)
+        multiworld.game = {player: world_type.game for player in multiworld.player_ids}
+        multiworld.player_name = {player: f"Tester{player}" for player in multiworld.player_ids}
+        multiworld.set_seed(seed)
+        args = argparse.Namespace()
+        for name, option in world_type.options_dataclass.type_hints.items():
+            setattr(args, name, {player: option.from_any(option.default) for player in multiworld.player_ids})
+        multiworld.set_options(args)
+        for player in multiworld.player_ids:
+            # set before any state is created, as states only track the worlds that have it set at their creation
+            multiworld.worlds[player].rule_dependency_tracking = tracking
+        multiworld.state = CollectionState(multiworld)
+        for step in gen_steps:
+            call_all(multiworld, step)
+        return multiworld
+
+    def fill(world_type: typing.Type[AutoWorld.World], tracking: bool) -> typing.Tuple[float, typing.List[str]]:
+        total = 0.0
+        placements: typing.List[str] = []
+        for seed in range(iterations):
+            multiworld = setup_multiworld(world_type, seed, tracking)
+            gc.collect()
+            with TimeIt(f"{world_type.game} fill with seed {seed}") as t:
+                distribute_items_restrictive(multiworld)
+                multiworld.get_all_state(False)
+            total += t.dif
+            placements.extend(f"{location}: {location.item}" for location in multiworld.get_filled_locations())
+        return total, placements
+
+    for game in sorted(games or AutoWorld.AutoWorldRegister.world_types):
+        world_type = AutoWorld.AutoWorldRegister.world_types[game]
+        try:
+            untracked, untracked_placements = fill(world_type, False)
+            tracked, tracked_placements = fill(world_type, True)
+        except Exception as e:
+            logger.exception(e)
+            continue
+        same = "same" if tracked_placements == untracked_placements else "DIFFERENT"
+        logger.info(f"{game}: {untracked:.4f} seconds without and {tracked:.4f} with rule dependency tracking "
+                    f"({untracked / tracked:.2f}x) for {iterations} fills of {players} players, {same} placements.")
+
+
+if __name__ == "__main__":
+    import path_change
+    path_change.change_home()
+    run_rule_dependency_tracking_benchmark()
@@ -4,7 +4,7 @@ import unittest
 from Options import Accessibility
 from test.general import generate_items, generate_locations, generate_test_multiworld
 from Fill import FillError, balance_multiworld_progression, fill_restrictive, \
-    distribute_early_items, distribute_items_restrictive
+    distribute_early_items, distribute_items_restrictive, sweep_from_pool, _sweep_from_pool_in_order
 from BaseClasses import Entrance, LocationProgressType, MultiWorld, Region, Item, Location, \
     ItemClassification
 from worlds.generic.Rules import CollectionRule, add_item_rule, locality_rules, set_rule
@@ -463,6 +463,51 @@ class TestFillRestrictive(unittest.TestCase):
         self.assertEqual(1, len(player1.prog_items))
         self.assertIsNot(loc0.item, player1.prog_items[0], "Filled item was still present in item pool")
 
+    def test_single_player_placement_keeps_location_order(self):
+        """Test that the locations left over by a single player placement keep their order"""
+        multiworld = generate_test_multiworld(2)
+        player1 = generate_player_data(multiworld, 1, 3, 1)
+        player2 = generate_player_data(multiworld, 2, 3, 1)
+        locations = [location for pair in zip(player1.locations, player2.locations) for location in pair]
+        remaining = [location for location in locations if location is not player2.locations[0]]
+
+        fill_restrictive(multiworld, multiworld.state, locations, player2.prog_items.copy(),
+                         single_player_placement=True)
+
+        self.assertEqual(player2.locations[0].item, player2.prog_items[0])
+        self.assertEqual(remaining, locations)
+
+    def test_always_allow_in_unreachable_region(self):
+        """Test that locations in unreachable regions are still filled if they always allow the item"""
+        multiworld = generate_test_multiworld()
+        player1 = generate_player_data(multiworld, 1, 1, 2)
+        locked_region = player1.generate_region(player1.menu, 1, lambda state: False)
+        locked_location = locked_region.locations[0]
+        locked_location.always_allow = lambda state, item: item == player1.prog_items[1]
+        locations = [locked_location, player1.locations[0]]
+
+        fill_restrictive(multiworld, multiworld.state, locations, player1.prog_items.copy())
+
+        self.assertEqual(locked_location.item, player1.prog_items[1])
+        self.assertEqual(player1.locations[0].item, player1.prog_items[0])
+
+    def test_sweep_in_previous_order(self):
+        """Test that sweeping in the order of a previous sweep collects the same as a regular sweep"""
+        multiworld = generate_test_multiworld()
+        player1 = generate_player_data(multiworld, 1, 1, 3)
+        region1 = player1.generate_region(player1.menu, 1, lambda state: state.has(player1.prog_items[0].name, 1))
+        region2 = player1.generate_region(region1, 1, lambda state: state.has(player1.prog_items[1].name, 1))
+        chain = [player1.locations[0], region1.locations[0], region2.locations[0]]
+        for location, item in zip(chain, player1.prog_items):
+            multiworld.push_item(location, item, False)
+
+        sweep_order = [[chain[2]], [chain[1], chain[0]]]
+        state = _sweep_from_pool_in_order(multiworld.state, [], None, sweep_order)
+
+        self.assertEqual(state.prog_items, sweep_from_pool(multiworld.state).prog_items)
+        self.assertEqual(state.advancements, set(chain))
+        self.assertEqual(sweep_order, [[chain[0]], [chain[1]], [chain[2]]])
+
 
 class TestDistributeItemsRestrictive(unittest.TestCase):
     def test_basic_distribute(self):
@@ -880,3 +925,21 @@ class TestBalanceMultiworldProgression(unittest.TestCase):
 
         self.assertRegionContains(
             self.player1.regions[2], self.player2.prog_items[0])
+
+    def test_moves_only_required_items(self) -> None:
+        """Test that progression balancing only moves the candidate items that are needed to reach the threshold"""
+        self.multiworld.worlds[self.player1.id].options.progression_balancing.value = 99
+        self.multiworld.worlds[self.player2.id].options.progression_balancing.value = 99
+
+        extra_locations = [location for location in self.player1.regions[2].locations
+                           if not location.item.advancement][:5]
+        for i, location in enumerate(extra_locations):
+            location.item = None
+            self.multiworld.push_item(location, Item(f"Extra {i}", ItemClassification.progression, None, 2), False)
+
+        balance_multiworld_progression(self.multiworld)
+
+        self.assertRegionContains(
+            self.player1.regions[1], self.player2.prog_items[0])
+        for location in extra_locations:
+            self.assertTrue(location.item.name.startswith("Extra"))
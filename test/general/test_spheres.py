@@ -0,0 +1,66 @@
+import unittest
+
+from BaseClasses import Item, ItemClassification, Location, MultiWorld, SphereIndex
+from Fill import distribute_items_restrictive, swap_location_item
+from worlds.AutoWorld import AutoWorldRegister, call_all
+from . import generate_locations, generate_test_multiworld, setup_multiworld
+
+
+class TestSphereIndex(unittest.TestCase):
+    multiworld: MultiWorld
+
+    def setUp(self) -> None:
+        worlds = [AutoWorldRegister.world_types[game] for game in ("A Short Hike", "Hylics 2")]
+        self.multiworld = setup_multiworld(worlds, seed=0)
+        distribute_items_restrictive(self.multiworld)
+        call_all(self.multiworld, "post_fill")
+
+    def test_same_spheres(self) -> None:
+        """Test that the shared spheres are the same as the ones calculated without an index"""
+        spheres = list(self.multiworld.get_spheres())
+        sendable_spheres = list(self.multiworld.get_sendable_spheres())
+        self.multiworld.sphere_index = sphere_index = SphereIndex(self.multiworld)
+        self.assertEqual(list(self.multiworld.get_spheres()), spheres)
+        self.assertEqual(list(self.multiworld.get_sendable_spheres()), sendable_spheres)
+        self.assertTrue(self.multiworld.fulfills_accessibility())
+        # modifying the yielded spheres does not modify the shared ones
+        next(self.multiworld.get_spheres()).clear()
+        self.assertEqual(list(self.multiworld.get_spheres()), spheres)
+        self.assertIs(self.multiworld.get_sphere_index(), sphere_index)
+
+    def test_dropped_after_swap(self) -> None:
+        """Test that the index is dropped once an item is moved"""
+        self.multiworld.sphere_index = SphereIndex(self.multiworld)
+        list(self.multiworld.get_spheres())
+        first, second = self.multiworld.get_filled_locations()[:2]
+        swap_location_item(first, second)
+        self.assertIsNone(self.multiworld.get_sphere_index())
+        self.assertIsNone(self.multiworld.sphere_index)
+
+    def test_kept_after_other_placement(self) -> None:
+        """Test that placing an item in another multiworld does not drop the index"""
+        self.multiworld.sphere_index = sphere_index = SphereIndex(self.multiworld)
+        other = generate_test_multiworld()
+        location = generate_locations(1, 1, other.get_region("Menu", 1))[0]
+        other.push_item(location, Item("Key", ItemClassification.progression, None, 1), collect=False)
+        self.assertIs(self.multiworld.get_sphere_index(), sphere_index)
+
+
+class TestPlaythrough(unittest.TestCase):
+    def test_culled_to_required_items(self) -> None:
+        """Test that the playthrough only keeps the items that are required to beat the game"""
+        multiworld = generate_test_multiworld()
+        menu = multiworld.get_region("Menu", 1)
+        names = ["Key", "Key", "Key", "Lamp", "Extra", "Extra", "Extra", "Extra"]
+        for location, name in zip(generate_locations(len(names), 1, menu), names):
+            location.place_locked_item(Item(name, ItemClassification.progression, None, 1))
+        victory = Location(1, "Victory", None, menu)
+        victory.access_rule = lambda state: state.has("Key", 1, 2) and state.has("Lamp", 1)
+        victory.place_locked_item(Item("Victory", ItemClassification.progression, None, 1))
+        menu.locations.append(victory)
+        multiworld.completion_condition[1] = lambda state: state.has("Victory", 1)
+
+        multiworld.spoiler.create_playthrough(create_paths=False)
+        playthrough = multiworld.spoiler.playthrough
+        self.assertEqual(sorted(playthrough["1"].values()), ["Key", "Key", "Lamp"])
+        self.assertEqual(list(playthrough["2"].values()), ["Victory"])
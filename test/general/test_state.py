@@ -1,7 +1,10 @@
 import unittest
+from collections import Counter
+from typing import Callable, List, Set
 
+from BaseClasses import CollectionState, CopyOnWriteDict, Item, ItemClassification, Location, Region
 from worlds.AutoWorld import AutoWorldRegister, call_all
-from . import setup_solo_multiworld
+from . import generate_test_multiworld, setup_solo_multiworld
 
 
 class TestBase(unittest.TestCase):
@@ -27,3 +30,194 @@ class TestBase(unittest.TestCase):
                     with self.subTest("Step", step=step):
                         call_all(multiworld, step)
                         self.assertTrue(multiworld.get_all_state(False, allow_partial_entrances=True))
+
+
+def counted(checks: Counter, name: str, rule: Callable[[CollectionState], bool]) -> Callable[[CollectionState], bool]:
+    def counted_rule(state: CollectionState) -> bool:
+        checks[name] += 1
+        return rule(state)
+    return counted_rule
+
+
+class TestRuleDependencyTracking(unittest.TestCase):
+    def setUp(self) -> None:
+        self.multiworld = generate_test_multiworld()
+        self.world = self.multiworld.worlds[1]
+        self.world.rule_dependency_tracking = True
+        menu = self.multiworld.get_region("Menu", 1)
+        self.regions = {name: Region(name, 1, self.multiworld) for name in ("A", "B", "C")}
+        self.multiworld.regions += self.regions.values()
+        self.checks = Counter()
+        menu.connect(self.regions["A"], "To A", counted(self.checks, "To A", lambda state: state.has("Key A", 1)))
+        menu.connect(self.regions["B"], "To B", counted(self.checks, "To B", lambda state: state.has("Key B", 1)))
+        # indirect condition on region A that is not registered
+        menu.connect(self.regions["C"], "To C",
+                     counted(self.checks, "To C", lambda state: state.can_reach_region("A", 1)))
+
+    def collect(self, state: CollectionState, name: str) -> None:
+        state.collect(Item(name, ItemClassification.progression, None, 1), True)
+
+    def test_reachability(self) -> None:
+        """Test that tracked regions become reachable through items and region dependencies"""
+        state = CollectionState(self.multiworld)
+        self.assertTrue(state.can_reach_region("Menu", 1))
+        self.assertFalse(state.can_reach_region("A", 1))
+        self.assertFalse(state.can_reach_region("C", 1))
+        self.collect(state, "Key A")
+        self.assertTrue(state.can_reach_region("A", 1))
+        self.assertTrue(state.can_reach_region("C", 1))
+        self.assertFalse(state.can_reach_region("B", 1))
+        self.collect(state, "Key B")
+        self.assertTrue(state.can_reach_region("B", 1))
+
+    def test_unrelated_items_skip_rules(self) -> None:
+        """Test that collecting an item only rechecks the entrances whose rules read it"""
+        state = CollectionState(self.multiworld)
+        self.assertFalse(state.can_reach_region("B", 1))
+        checks = self.checks.copy()
+        self.collect(state, "Key A")
+        self.assertTrue(state.can_reach_region("A", 1))
+        self.assertEqual(self.checks["To A"], checks["To A"] + 1)
+        self.assertEqual(self.checks["To B"], checks["To B"])
+        self.collect(state, "Nothing")
+        self.assertFalse(state.can_reach_region("B", 1))
+        self.assertEqual(self.checks["To B"], checks["To B"])
+
+    def test_copy_and_remove(self) -> None:
+        """Test that copies track independently and removing an item resets the tracked dependencies"""
+        state = CollectionState(self.multiworld)
+        self.assertFalse(state.can_reach_region("A", 1))
+        copy = state.copy()
+        self.collect(copy, "Key A")
+        self.assertTrue(copy.can_reach_region("C", 1))
+        self.assertFalse(state.can_reach_region("C", 1))
+        copy.remove(Item("Key A", ItemClassification.progression, None, 1))
+        self.assertFalse(copy.can_reach_region("A", 1))
+        self.assertFalse(copy.can_reach_region("C", 1))
+        self.collect(copy, "Key A")
+        self.assertTrue(copy.can_reach_region("C", 1))
+
+    def test_untracked_reads(self) -> None:
+        """Test that rules reading other players' state are rechecked on every update"""
+        self.multiworld = generate_test_multiworld(2)
+        self.multiworld.worlds[1].rule_dependency_tracking = True
+        target = Region("Target", 1, self.multiworld)
+        self.multiworld.regions.append(target)
+        self.multiworld.get_region("Menu", 1).connect(target, "To Target", lambda state: state.has("Key", 2))
+        state = CollectionState(self.multiworld)
+        self.assertFalse(state.can_reach(target))
+        state.collect(Item("Key", ItemClassification.progression, None, 2), True)
+        state.stale[1] = True
+        self.assertTrue(state.can_reach(target))
+
+    def test_attribute_reads_are_untracked(self) -> None:
+        """Test that rules reading the state's attributes directly are rechecked on every update"""
+        target = Region("Target", 1, self.multiworld)
+        self.multiworld.regions.append(target)
+        self.multiworld.get_region("Menu", 1).connect(target, "To Target",
+                                                      lambda state: bool(state.locations_checked))
+        state = CollectionState(self.multiworld)
+        self.assertFalse(state.can_reach(target))
+        state.locations_checked.add(Location(1, "Checked", None, self.multiworld.get_region("Menu", 1)))
+        state.stale[1] = True
+        self.assertTrue(state.can_reach(target))
+
+    def test_sweep_skips_unchanged_locations(self) -> None:
+        """Test that a sweep only rechecks the locations whose recorded items or regions changed"""
+        keys = {}
+        for name, region, rule in (("Key A", "Menu", lambda state: True),
+                                   ("Key B", "A", lambda state: True),
+                                   ("Nothing", "Menu", lambda state: state.has("Key B", 1)),
+                                   ("Locked", "Menu", lambda state: state.has("Missing", 1))):
+            location = Location(1, f"{name} Location", None, self.multiworld.get_region(region, 1))
+            location.access_rule = counted(self.checks, location.name, rule)
+            location.place_locked_item(Item(name, ItemClassification.progression, None, 1))
+            location.parent_region.locations.append(location)
+            keys[name] = location
+        state = CollectionState(self.multiworld)
+        state.sweep_for_advancements(keys.values())
+        self.assertEqual(state.advancements, {keys["Key A"], keys["Key B"], keys["Nothing"]})
+        self.assertTrue(state.can_reach_region("B", 1))
+        # reached through region A, then checked again once Key B was collected
+        self.assertEqual(self.checks["Key B Location"], 1)
+        self.assertEqual(self.checks["Nothing Location"], 2)
+        # never checked again, as Missing was not collected
+        self.assertEqual(self.checks["Locked Location"], 1)
+
+
+class TestRuleDependencyTrackingWorlds(unittest.TestCase):
+    def test_same_reachability(self) -> None:
+        """Test that tracking rule dependencies reaches the same regions and locations in every world"""
+        for game_name, world_type in AutoWorldRegister.world_types.items():
+            with self.subTest("Game", game=game_name):
+                multiworld = setup_solo_multiworld(world_type)
+                expected = multiworld.get_all_state()
+                multiworld.worlds[1].rule_dependency_tracking = True
+                state = multiworld.get_all_state()
+                self.assertEqual({region for region in multiworld.get_regions(1) if region.can_reach(state)},
+                                 {region for region in multiworld.get_regions(1) if region.can_reach(expected)})
+                self.assertEqual(state.advancements, expected.advancements)
+
+
+class TestCopyOnWrite(unittest.TestCase):
+    def test_values_copied_on_lookup(self) -> None:
+        """Test that CopyOnWriteDict only copies values that are looked up after a copy"""
+        copies: List[int] = []
+
+        def copy_value(value: Set[int]) -> Set[int]:
+            copies.append(len(value))
+            return value.copy()
+
+        original = CopyOnWriteDict({1: {1}, 2: {1, 2}}, copy_value=copy_value)
+        # the original's own values are moved into a shared layer, not copied
+        copy = original.copy()
+        self.assertEqual(copies, [])
+        # values that the copy didn't look up are shared with its copies
+        copy_copy = copy.copy()
+        self.assertEqual(copies, [])
+        copy[1].add(3)
+        self.assertEqual(copies, [1])
+        self.assertEqual(original[1], {1})
+        self.assertEqual(copies, [1, 1])
+        self.assertEqual(copy[1], {1, 3})
+        self.assertEqual(copy_copy[1], {1})
+        self.assertEqual(copies, [1, 1, 1])
+        self.assertEqual(len(copy_copy), 2)
+        self.assertIn(2, copy_copy)
+        self.assertEqual(copies, [1, 1, 1])
+        self.assertEqual(dict(copy_copy.items()), {1: {1}, 2: {1, 2}})
+        self.assertEqual(copies, [1, 1, 1, 2])
+        self.assertEqual(original, {1: {1}, 2: {1, 2}})
+        del copy[2]
+        self.assertNotIn(2, copy)
+        self.assertEqual(original.pop(2), {1, 2})
+        self.assertEqual(original.get(2, "missing"), "missing")
+
+    def test_source_copies_on_lookup(self) -> None:
+        """Test that the source of a copy looks up a private copy of the values it moved into the shared layer"""
+        original = CopyOnWriteDict({1: {1}})
+        value = original[1]
+        copy = original.copy()
+        original[1].add(2)
+        self.assertIsNot(original[1], value)
+        self.assertEqual(original[1], {1, 2})
+        self.assertEqual(copy[1], {1})
+        self.assertEqual(value, {1})
+
+    def test_state_copies_are_independent(self) -> None:
+        """Test that modifying one player's items in a state copy does not leak into the other state"""
+        multiworld = generate_test_multiworld(2)
+        state = CollectionState(multiworld)
+        state.collect(Item("Shared", ItemClassification.progression, None, 2), True)
+        copy = state.copy()
+        copy.collect(Item("Copy", ItemClassification.progression, None, 1), True)
+        state.collect(Item("Original", ItemClassification.progression, None, 1), True)
+        self.assertTrue(copy.has("Copy", 1))
+        self.assertFalse(copy.has("Original", 1))
+        self.assertTrue(state.has("Original", 1))
+        self.assertFalse(state.has("Copy", 1))
+        self.assertTrue(copy.has("Shared", 2))
+        self.assertTrue(state.has("Shared", 2))
+        self.assertIsNot(state.prog_items[2], copy.prog_items[2])
+        self.assertTrue(state.can_reach_region("Menu", 1))
+        self.assertTrue(copy.copy().can_reach_region("Menu", 2))
@@ -0,0 +1,75 @@
+import typing
+import unittest
+import unittest.mock
+
+from NetUtils import Hint, HintStatus, NetworkItem, NetworkPlayer, NetworkSlot, SlotType, _encode, _scan_for_TypedTuples, decode, encode
+
+
+class TestEncode(unittest.TestCase):
+    def test_same_as_json(self) -> None:
+        """Test that messages are encoded the same as by the json module"""
+        msgs = [
+            {"cmd": "ReceivedItems", "index": 0, "items": [NetworkItem(1, 2, 3), NetworkItem(4, 5, 6, 1)]},
+            {"cmd": "Connected", "slot_info": {1: NetworkSlot("Player1", "Archipelago", SlotType.player)},
+             "checked_locations": {1, 2, 3}, "missing_locations": frozenset()},
+            {"cmd": "PrintJSON", "data": [{"text": "ünïcode"}], "status": HintStatus.HINT_FOUND},
+        ]
+        self.assertEqual(encode(msgs), _encode(_scan_for_TypedTuples(msgs)))
+        self.assertEqual(decode(encode(msgs))[0]["items"], [NetworkItem(1, 2, 3), NetworkItem(4, 5, 6, 1)])
+
+    def test_message_types_same_as_json(self) -> None:
+        """Test that each message type the server sends is encoded byte for byte the same as by the json module"""
+        class Nested(typing.NamedTuple):
+            item: NetworkItem
+            items: typing.List[NetworkItem]
+
+        msgs = [
+            {"cmd": "RoomInfo", "password": False, "games": ["Archipelago"], "tags": ["AP"],
+             "version": {"major": 0, "minor": 6, "build": 0, "class": "Version"}, "hint_cost": 10,
+             "location_check_points": 1, "datapackage_checksums": {"Archipelago": "abc"}, "seed_name": "1",
+             "time": 1700000000.123456, "permissions": {"release": 2}},
+            {"cmd": "ConnectionRefused", "errors": ["InvalidSlot"]},
+            {"cmd": "Connected", "team": 0, "slot": 1,
+             "players": [NetworkPlayer(0, 1, "Alias", "Name"), NetworkPlayer(0, 2, "Other", "Other")],
+             "missing_locations": [1, 2], "checked_locations": [3], "slot_data": {"option": None, "ratio": 0.5},
+             "slot_info": {1: NetworkSlot("Name", "Archipelago", SlotType.player),
+                           3: NetworkSlot("Group", "Archipelago", SlotType.group, [1, 2])},
+             "hint_points": 5},
+            {"cmd": "ReceivedItems", "index": 3, "items": [NetworkItem(1, 2, 3, 1), NetworkItem(4, -1, 0)]},
+            {"cmd": "LocationInfo", "locations": [NetworkItem(1, 2, 3, 4)]},
+            {"cmd": "RoomUpdate", "checked_locations": [4, 5], "hint_points": 3},
+            {"cmd": "PrintJSON", "type": "ItemSend", "receiving": 1, "item": NetworkItem(1, 2, 3, 1),
+             "data": [{"text": "ünïcode \" quoted", "type": "player_id"}]},
+            {"cmd": "PrintJSON", "type": "Hint", "receiving": 1, "item": NetworkItem(1, 2, 3), "found": False,
+             "data": Hint(1, 2, 3, 4, False, "Entrance", 1, HintStatus.HINT_PRIORITY).as_network_message()["data"]},
+            {"cmd": "Bounced", "tags": ["DeathLink"], "data": {"time": 1700000000.5, "source": "Name", "cause": None}},
+            {"cmd": "Retrieved", "keys": {"big": 1e16, "small": 1e-05, "tiny": 1.5e-9, "tinier": 1.5e-10,
+                                          "none": None, "huge": 2 ** 70, "list": [1.0, -0.0, 650.00002]}},
+            {"cmd": "SetReply", "key": "key", "value": [1, 2], "original_value": None, "slot": 1},
+            {"cmd": "InvalidPacket", "type": "cmd", "text": "Unknown", "original_cmd": None},
+            {"cmd": "Nested", "data": Nested(NetworkItem(1, 2, 3), [NetworkItem(4, 5, 6)])},
+        ]
+        for msg in msgs:
+            with self.subTest(cmd=msg["cmd"]):
+                self.assertEqual(encode([msg]), _encode(_scan_for_TypedTuples([msg])))
+
+    def test_non_finite_floats(self) -> None:
+        """Test that non-finite floats are written as valid JSON"""
+        self.assertEqual(encode({"value": [float("nan"), float("inf"), -float("inf")]}),
+                         '{"value":[null,null,null]}')
+
+    def test_none_encoded_once(self) -> None:
+        """Test that payloads containing None are encoded by orjson alone"""
+        msgs = [{"cmd": "SetReply", "key": "key", "value": None, "original_value": None, "slot": 1}]
+        with unittest.mock.patch("NetUtils._encode") as json_encode:
+            self.assertEqual(encode(msgs), '[{"cmd":"SetReply","key":"key","value":null,"original_value":null,'
+                                           '"slot":1}]')
+        json_encode.assert_not_called()
+
+    def test_big_integers(self) -> None:
+        """Test that integers beyond 64 bit can still be encoded"""
+        self.assertEqual(encode({"value": 2 ** 70}), '{"value":%d}' % 2 ** 70)
+
+    def test_unsupported_type(self) -> None:
+        with self.assertRaises(TypeError):
+            encode({"value": object()})
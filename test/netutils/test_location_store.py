@@ -165,6 +165,20 @@ class Base:
             with self.assertRaises(KeyError):
                 self.store.get_remaining(bad_state, 0, 9999)
 
+        def test_get_sphere(self) -> None:
+            self.assertEqual(self.store.get_sphere(1, 11), -1)
+            self.store.set_spheres([{1: {12}, 2: {23, 99}}, {1: {11}, 9999: {1}}])
+            self.assertEqual(self.store.get_sphere(1, 12), 0)
+            self.assertEqual(self.store.get_sphere(2, 23), 0)
+            self.assertEqual(self.store.get_sphere(1, 11), 1)
+            self.assertEqual(self.store.get_sphere(1, 13), -1)
+
+        def test_get_sphere_exception(self) -> None:
+            with self.assertRaises(KeyError):
+                self.store.get_sphere(1, 99)
+            with self.assertRaises(KeyError):
+                self.store.get_sphere(9999, 11)
+
         def test_location_set_intersection(self) -> None:
             locations = {10, 11, 12}
             locations.intersection_update(self.store[1])
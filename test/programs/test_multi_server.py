@@ -1,5 +1,21 @@
+import asyncio
+import os
+import tempfile
+import typing
 import unittest
-from MultiServer import Context, ServerCommandProcessor
+import zlib
+
+from typing_extensions import override
+
+from MultiServer import Client, Context, ReceivedItems, SaveJournal, ServerCommandProcessor, broadcast_team_texts, \
+    get_received_items, process_client_cmd, register_location_checks, send_items_to, send_new_items, team_slot
+from Utils import restricted_loads
+from NetUtils import Endpoint, Hint, HintStatus, LocationStore, NetworkItem, NetworkSlot, SlotType, decode
+
+
+def make_client(ctx: Context, socket: typing.Any = None) -> Client:
+    """Returns a client of the context, without a connection unless a stand-in socket is given"""
+    return Client(socket, ctx)
 
 
 class TestResolvePlayerName(unittest.TestCase):
@@ -38,3 +54,424 @@ class TestResolvePlayerName(unittest.TestCase):
         assert p.resolve_player("ABC") == (1, 2, "abc"), "case insensitive resolves when 1 match"
         assert p.resolve_player("abcd") == (1, 3, "abCD"), "case insensitive resolves when 1 match"
         assert not p.resolve_player("aB"), "partial name shouldn't resolve to player"
+
+
+class TestHints(unittest.TestCase):
+    def test_recheck_checked_locations(self) -> None:
+        """Test that rechecking the hints of checked locations updates them for the finding and receiving slots"""
+        ctx = Context("", 0, "", "", 0, 0, False)
+        checked = Hint(2, 1, 100, 10, False, status=HintStatus.HINT_PRIORITY)
+        unchecked = Hint(2, 1, 101, 11, False, status=HintStatus.HINT_PRIORITY)
+        for slot in (1, 2):
+            ctx.hints[0, slot] = {checked, unchecked}
+            ctx.index_hints(0, slot)
+        self.assertIs(ctx.get_hint(0, 1, 100), checked)
+        self.assertIsNone(ctx.get_hint(0, 2, 100))
+
+        ctx.location_checks[0, 1] = {100, 101}
+        changed: typing.Set[team_slot] = set()
+        ctx.recheck_hints(0, 1, changed, [100])
+
+        found = checked._replace(found=True, status=HintStatus.HINT_FOUND)
+        self.assertEqual(changed, {(0, 1), (0, 2)})
+        for slot in (1, 2):
+            self.assertEqual(ctx.hints[0, slot], {found, unchecked})
+        self.assertEqual(ctx.get_hint(0, 1, 100), found)
+        self.assertIs(ctx.get_hint(0, 1, 101), unchecked)
+
+    def test_recheck_hints_sharing_location(self) -> None:
+        """Test that all hints for a checked location get found, not only the last one indexed"""
+        ctx = Context("", 0, "", "", 0, 0, False)
+        hints = {Hint(2, 1, 100, 10, False), Hint(2, 1, 100, 10, False, entrance="Cave")}
+        for slot in (1, 2):
+            ctx.hints[0, slot] = set(hints)
+            ctx.index_hints(0, slot)
+
+        ctx.location_checks[0, 1] = {100}
+        ctx.recheck_hints(0, 1, locations=[100])
+
+        found = {hint._replace(found=True, status=HintStatus.HINT_FOUND) for hint in hints}
+        for slot in (1, 2):
+            self.assertEqual(ctx.hints[0, slot], found)
+        self.assertEqual(ctx.hints_by_location[0, 1], {100: found})
+
+
+class TestBroadcastTeamTexts(unittest.IsolatedAsyncioTestCase):
+    async def test_batches_texts(self) -> None:
+        """Test that the texts of one event loop iteration are encoded in chunks and sent with one broadcast"""
+        sent: typing.List[typing.Tuple[typing.List[Endpoint], typing.List[typing.Any]]] = []
+
+        class TextContext(Context):
+            @override
+            async def broadcast_send_encoded_msgs_list(self, endpoints: typing.Iterable[Endpoint],
+                                                       msgs: typing.Sequence[str]) -> bool:
+                sent.append((list(endpoints), [decode(msg) for msg in msgs]))
+                return True
+
+        ctx = TextContext("", 0, "", "", 0, 0, False)
+        text, no_text, other_team = make_client(ctx), make_client(ctx), make_client(ctx)
+        no_text.no_text = True
+        ctx.clients = {0: {1: [text], 2: [no_text]}, 1: {1: [other_team]}}
+        texts = [{"cmd": "PrintJSON", "data": [{"text": str(number)}]} for number in range(200)]
+        broadcast_team_texts(ctx, 0, texts[:150])
+        broadcast_team_texts(ctx, 0, texts[150:])
+        self.assertEqual(sent, [], "texts should only be sent after the current event loop iteration")
+        await asyncio.sleep(0)
+        await asyncio.sleep(0)
+
+        self.assertEqual(sent, [([text], [texts[:140], texts[140:]])])
+
+
+class TestReceivedItems(unittest.TestCase):
+    def test_views(self) -> None:
+        """Test that the items of a slot are seen with and without remote_items, also after saving and loading"""
+        ctx = Context("", 0, "", "", 0, 0, False)
+        ctx.groups = {3: {1, 2}}
+        own, other, group_own = NetworkItem(1, 10, 1), NetworkItem(2, 20, 2, 1), NetworkItem(3, 30, 1)
+        send_items_to(ctx, 0, 1, own, other)
+        send_items_to(ctx, 0, 3, group_own)
+        send_items_to(ctx, 0, 1, own)
+
+        self.assertEqual(list(get_received_items(ctx, 0, 1, True)), [own, other, group_own, own])
+        self.assertEqual(list(get_received_items(ctx, 0, 1, False)), [other, group_own])
+        self.assertEqual(get_received_items(ctx, 0, 1, True)[1:], [other, group_own, own])
+        self.assertEqual(get_received_items(ctx, 0, 1, False)[-1], group_own)
+        self.assertEqual(get_received_items(ctx, 0, 2, False)[:], [group_own])
+
+        save = ctx.get_received_items_save()
+        self.assertEqual(save[0, 1, True], [own, other, group_own, own])
+        self.assertEqual(save[0, 1, False], [other, group_own])
+        self.assertIs(save[0, 1, False][0], save[0, 1, True][1])
+        loaded = ReceivedItems.from_lists(save[0, 1, True], save[0, 1, False])
+        self.assertEqual(list(loaded), list(get_received_items(ctx, 0, 1, True)))
+        self.assertEqual(list(loaded.non_remote), list(get_received_items(ctx, 0, 1, False)))
+
+
+class TestSaveJournal(unittest.TestCase):
+    @override
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+        self.save_filename = os.path.join(self.directory.name, "test.apsave")
+        self.journal = SaveJournal(self.save_filename)
+        self.save_data: typing.Dict[str, typing.Any] = {
+            "version": 2,
+            "received_items": {(0, 1, True): [NetworkItem(1, 1, 2)]},
+            "location_checks": {(0, 2): {1}},
+            "hints": {(0, 1): {Hint(1, 2, 3, 4, False)}},
+            "stored_data": {"a": 1, "b": [1], "c": os.urandom(4096)},
+            "client_game_state": {(0, 1): 0},
+        }
+
+    @override
+    def tearDown(self) -> None:
+        self.directory.cleanup()
+
+    def write(self) -> None:
+        if self.journal.save_due:
+            self.journal.clear_changes()
+            self.journal.write_save(self.save_data)
+        else:
+            received_items: typing.Dict[team_slot, ReceivedItems] = {}
+            for (team, slot, remote_items), items in self.save_data["received_items"].items():
+                if remote_items:
+                    non_remote_items = self.save_data["received_items"].get((team, slot, False), ())
+                    received_items[team, slot] = ReceivedItems.from_lists(items, non_remote_items)
+            self.journal.write(received_items, self.save_data["hints"], self.save_data["stored_data"],
+                               {key: value for key, value in self.save_data.items()
+                                if key not in SaveJournal.journaled_keys})
+
+    def check_locations(self, team: int, slot: int, locations: typing.Set[int]) -> None:
+        self.save_data["location_checks"].setdefault((team, slot), set()).update(locations)
+        self.journal.add_location_checks(team, slot, locations)
+
+    def load(self) -> typing.Dict[str, typing.Any]:
+        with open(self.save_filename, "rb") as f:
+            save_data = restricted_loads(zlib.decompress(f.read()))
+        SaveJournal(self.save_filename).replay(save_data)
+        del save_data["journal_id"]
+        return save_data
+
+    def test_replays_changes(self) -> None:
+        """Test that the changes appended to the journal are applied to the save when loading it"""
+        self.write()
+        self.save_data["received_items"][0, 1, True].append(NetworkItem(2, 2, 2))
+        self.save_data["received_items"][0, 2, True] = [NetworkItem(3, 3, 1)]
+        self.save_data["received_items"][0, 2, False] = [NetworkItem(3, 3, 1)]
+        self.check_locations(0, 2, {2})
+        self.write()
+        self.save_data["hints"][0, 1] = {Hint(1, 2, 3, 4, True, status=HintStatus.HINT_FOUND)}
+        self.journal.changed_hints.add((0, 1))
+        self.save_data["stored_data"]["b"].append(2)
+        self.journal.changed_stored_data.add("b")
+        self.save_data["client_game_state"][0, 1] = 30
+        self.write()
+
+        with open(self.save_filename, "rb") as f:
+            save_data = restricted_loads(zlib.decompress(f.read()))
+        self.assertEqual(SaveJournal(self.save_filename).replay(save_data), 2)
+        del save_data["journal_id"]
+        self.assertEqual(save_data, self.save_data)
+
+    def test_writes_new_locations_only(self) -> None:
+        """Test that an entry holds only the locations checked since the last write"""
+        self.write()
+        self.check_locations(0, 2, set(range(2, 1000)))
+        self.write()
+        size = self.journal.journal_size
+        self.check_locations(0, 2, {1000})
+        self.write()
+
+        self.assertLess(self.journal.journal_size - size, 200)
+        self.assertEqual(self.load(), self.save_data)
+
+    def test_rewrites_save(self) -> None:
+        """Test that the save is written again once the journal is larger than it"""
+        self.write()
+        self.check_locations(0, 2, set(range(2, 10000)))
+        self.write()
+        self.assertGreater(self.journal.journal_size, self.journal.save_size)
+        self.check_locations(0, 2, {10000})
+        self.write()
+
+        self.assertEqual(os.path.getsize(self.journal.filename), 0)
+        self.assertEqual(self.load(), self.save_data)
+
+    def test_ignores_incomplete_entry(self) -> None:
+        """Test that an entry that was not written completely is ignored"""
+        self.write()
+        self.check_locations(0, 2, {2})
+        self.write()
+        expected = {**self.save_data, "location_checks": {(0, 2): {1, 2}}}
+        self.check_locations(0, 2, {3})
+        self.write()
+        with open(self.journal.filename, "r+b") as f:
+            f.truncate(os.path.getsize(self.journal.filename) - 1)
+
+        self.assertEqual(self.load(), expected)
+
+
+class TestSave(unittest.IsolatedAsyncioTestCase):
+    @override
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+
+    @override
+    def tearDown(self) -> None:
+        self.directory.cleanup()
+
+    class SaveContext(Context):
+        """A Context that is only saved when the test does so"""
+        @override
+        def _start_async_saving(self, atexit_save: bool = True) -> None:
+            pass
+
+        def save_on_exit(self) -> bool:
+            return self._save(True)
+
+    def make_context(self) -> SaveContext:
+        ctx = self.SaveContext("", 0, "", "", 0, 0, False)
+        ctx.data_filename = os.path.join(self.directory.name, "test.archipelago")
+        ctx.connect_names = {"Player1": (0, 1), "Player2": (0, 2)}
+        ctx.player_names = {(0, 1): "Player1", (0, 2): "Player2"}
+        ctx.slot_info = {1: NetworkSlot("Player1", "Game", SlotType.player),
+                         2: NetworkSlot("Player2", "Game", SlotType.player)}
+        ctx.locations = LocationStore({1: {100 + item: (item, 2, 0) for item in range(10)}, 2: {}})
+        ctx.item_names = {"Game": {item: f"Item {item}" for item in range(10)}}
+        ctx.location_names = {"Game": {100 + item: f"Location {item}" for item in range(10)}}
+        ctx.clients = {0: {1: [], 2: []}}
+        return ctx
+
+    async def test_reload(self) -> None:
+        """Test that what a server saved, written whole or to the journal, is there when it loads the save again"""
+        ctx = self.make_context()
+        ctx.init_save()
+        assert ctx.save_journal and ctx.save_filename
+        ctx.notify_hints(0, [Hint(2, 1, 105, 5, False)])
+        register_location_checks(ctx, 0, 1, [100, 101])
+        self.assertTrue(ctx.save(True))
+        self.assertEqual(os.path.getsize(ctx.save_journal.filename), 0, "the first save should be written whole")
+        register_location_checks(ctx, 0, 1, [102, 105])
+        client = make_client(ctx)
+        client.auth = True
+        client.team, client.slot = 0, 1
+        await process_client_cmd(ctx, client, {"cmd": "Set", "key": "key", "default": 0,
+                                               "operations": [{"operation": "add", "value": 2}]})
+        self.assertTrue(ctx.save(True))
+        self.assertGreater(os.path.getsize(ctx.save_journal.filename), 0, "the changes should be journaled")
+
+        loaded = self.make_context()
+        loaded.init_save()
+        self.assertEqual(loaded.location_checks[0, 1], {100, 101, 102, 105})
+        self.assertEqual(list(get_received_items(loaded, 0, 2, True)),
+                         list(get_received_items(ctx, 0, 2, True)))
+        self.assertEqual(loaded.hints[0, 2], {Hint(2, 1, 105, 5, True, status=HintStatus.HINT_FOUND)})
+        self.assertEqual(loaded.stored_data, {"key": 2})
+
+    async def test_exit_save(self) -> None:
+        """Test that the save is written whole on exit, so it is complete without the journal"""
+        ctx = self.make_context()
+        ctx.init_save()
+        assert ctx.save_journal and ctx.save_filename
+        self.assertTrue(ctx.save(True))
+        register_location_checks(ctx, 0, 1, [100])
+        self.assertTrue(ctx.save(True))
+        self.assertGreater(os.path.getsize(ctx.save_journal.filename), 0)
+        register_location_checks(ctx, 0, 1, [101])
+        self.assertTrue(ctx.save_on_exit())
+        self.assertFalse(os.path.exists(ctx.save_journal.filename))
+
+        with open(ctx.save_filename, "rb") as f:
+            save_data = restricted_loads(zlib.decompress(f.read()))
+        self.assertEqual(save_data["location_checks"][0, 1], {100, 101})
+
+
+class TestSet(unittest.IsolatedAsyncioTestCase):
+    async def test_original_value(self) -> None:
+        """Test that the value before the operations is only sent along when anyone is notified of the change"""
+        broadcasts: typing.List[typing.Tuple[typing.Set[Client], typing.List[typing.Dict[str, typing.Any]]]] = []
+
+        class SetContext(Context):
+            @override
+            def save(self, now: bool = False) -> bool:
+                return True
+
+            @override
+            def broadcast(self, endpoints: typing.Iterable[Client],
+                          msgs: typing.List[typing.Dict[str, typing.Any]]) -> None:
+                broadcasts.append((set(endpoints), msgs))
+
+        ctx = SetContext("", 0, "", "", 0, 0, False)
+        client = make_client(ctx)
+        client.auth = True
+        client.slot = 1
+        ctx.stored_data["list"] = [1, 2, 3]
+        ctx.save_journal = SaveJournal(os.devnull)
+
+        await process_client_cmd(ctx, client, {"cmd": "Set", "key": "list",
+                                               "operations": [{"operation": "remove", "value": 1}]})
+        self.assertEqual(broadcasts, [])
+        self.assertNotIn("list", ctx.stored_data_notification_clients)
+
+        await process_client_cmd(ctx, client, {"cmd": "Set", "key": "list", "want_reply": True,
+                                               "operations": [{"operation": "remove", "value": 2}]})
+        self.assertEqual(ctx.stored_data["list"], [3])
+        self.assertEqual(len(broadcasts), 1)
+        targets, (msg,) = broadcasts[0]
+        self.assertEqual(targets, {client})
+        self.assertEqual(msg["original_value"], [2, 3])
+        self.assertEqual(msg["value"], [3])
+        self.assertEqual(ctx.save_journal.changed_stored_data, {"list"})
+
+
+class TestBounce(unittest.IsolatedAsyncioTestCase):
+    async def test_routing(self) -> None:
+        """Test that bounces reach the clients of the sender's team that match a game, tag or slot"""
+        sent: typing.List[typing.Tuple[typing.Set[Endpoint], typing.Any]] = []
+
+        class BounceContext(Context):
+            @override
+            async def broadcast_send_encoded_msgs(self, endpoints: typing.Iterable[Endpoint], msg: str) -> bool:
+                sent.append((set(endpoints), decode(msg)))
+                return True
+
+        ctx = BounceContext("", 0, "", "", 0, 0, False)
+        ctx.games = {1: "A", 2: "B", 3: "B"}
+        ctx.slots_by_game = {"A": [1], "B": [2, 3]}
+        ctx.clients = {0: {1: [], 2: [], 3: []}, 1: {1: [], 2: [], 3: []}}
+        clients: typing.Dict[team_slot, Client] = {}
+        for team, slot, tags in ((0, 1, ["AP"]), (0, 2, ["DeathLink"]), (0, 3, ["AP"]), (1, 1, ["DeathLink"])):
+            client = make_client(ctx)
+            client.auth = True
+            client.team = team
+            client.slot = slot
+            client.tags = tags
+            ctx.clients[team][slot].append(client)
+            ctx.player_names[team, slot] = f"Player{slot}"
+            ctx.tag_client(client)
+            clients[team, slot] = client
+        sender = clients[0, 1]
+
+        cases: typing.List[typing.Tuple[typing.Dict[str, typing.Any], typing.Set[Client]]] = [
+            ({"tags": ["DeathLink"]}, {clients[0, 2]}),
+            ({"games": ["B"]}, {clients[0, 2], clients[0, 3]}),
+            ({"slots": [1], "tags": ["AP"]}, {clients[0, 1], clients[0, 3]}),
+            ({"tags": ["Unused"]}, set()),
+        ]
+        for args, targets in cases:
+            with self.subTest(args=args):
+                sent.clear()
+                await process_client_cmd(ctx, sender, {"cmd": "Bounce", "data": {"time": 1}, **args})
+                if targets:
+                    self.assertEqual(sent, [(targets, [{"cmd": "Bounced", "data": {"time": 1}, **args}])])
+                else:
+                    self.assertEqual(sent, [])
+
+        await process_client_cmd(ctx, clients[0, 2], {"cmd": "ConnectUpdate", "tags": ["AP"]})
+        ctx.untag_client(clients[0, 3])
+        self.assertEqual(ctx.tagged_clients, {(0, "AP"): {clients[0, 1], clients[0, 2]},
+                                              (1, "DeathLink"): {clients[1, 1]}})
+
+
+class TestEncodeDataPackage(unittest.TestCase):
+    def test_reuses_encoded_data_package(self) -> None:
+        ctx = Context("", 0, "", "", 0, 0, False)
+        games = {"Archipelago": ctx.gamespackage["Archipelago"]}
+        msg = ctx.encode_data_package(games)
+        self.assertEqual(decode(msg), [{"cmd": "DataPackage", "data": {"games": games}}])
+        self.assertIs(ctx.encode_data_package(dict(games)), msg)
+
+        unchecked_games = {"Archipelago": {key: value for key, value in games["Archipelago"].items()
+                                           if key != "checksum"}}
+        self.assertEqual(decode(ctx.encode_data_package(unchecked_games)),
+                         [{"cmd": "DataPackage", "data": {"games": unchecked_games}}])
+
+
+class TestSendNewItems(unittest.IsolatedAsyncioTestCase):
+    async def test_sends_to_receivers_once(self) -> None:
+        sent: typing.List[typing.Tuple[Endpoint, typing.List[typing.Dict[str, typing.Any]]]] = []
+
+        class ItemContext(Context):
+            @override
+            async def send_msgs(self, endpoint: Endpoint, msgs: typing.Iterable[typing.Dict[str, typing.Any]]) -> bool:
+                sent.append((endpoint, list(msgs)))
+                return True
+
+        ctx = ItemContext("", 0, "", "", 0, 0, False)
+        receiver, other = make_client(ctx), make_client(ctx)
+        ctx.clients = {0: {1: [receiver], 2: [other]}}
+        items = [NetworkItem(1, 1, 2, 0), NetworkItem(2, 2, 2, 0)]
+        for item in items:
+            send_items_to(ctx, 0, 1, item)
+            send_new_items(ctx)
+        self.assertEqual(sent, [], "items should only be sent after the current event loop iteration")
+        await asyncio.sleep(0)
+        await asyncio.sleep(0)
+
+        self.assertEqual(sent, [(receiver, [{"cmd": "ReceivedItems", "index": 0, "items": items}])])
+        self.assertEqual(receiver.send_index, 2)
+        self.assertEqual(other.send_index, 0)
+
+    async def test_sent_before_other_messages(self) -> None:
+        """Test that pending items are sent ahead of other messages to the same client"""
+        ctx = Context("", 0, "", "", 0, 0, False)
+        sent: typing.List[typing.Any] = []
+
+        class Socket:
+            open = True
+
+            async def send(self, msg: str) -> None:
+                sent.append(decode(msg))
+
+        receiver = make_client(ctx, Socket())
+        receiver.auth, receiver.team, receiver.slot = True, 0, 1
+        ctx.clients = {0: {1: [receiver]}}
+        item = NetworkItem(1, 1, 2, 0)
+        send_items_to(ctx, 0, 1, item)
+        send_new_items(ctx)
+        await ctx.send_msgs(receiver, [{"cmd": "RoomUpdate", "checked_locations": [1]}])
+        await asyncio.sleep(0)
+        await asyncio.sleep(0)
+
+        self.assertEqual(sent, [[{"cmd": "ReceivedItems", "index": 0, "items": [item]},
+                                 {"cmd": "RoomUpdate", "checked_locations": [1]}]])
+        self.assertEqual(receiver.send_index, 1)
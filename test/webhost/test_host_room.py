@@ -42,6 +42,56 @@ class TestHostFakeRoom(TestBase):
         except FileNotFoundError:
             pass
 
+    def test_dispatch_commands(self) -> None:
+        """Verify that commands are passed to the room they are for and that its tracker events get published,
+        also when another room fails to give its events."""
+        import asyncio
+        import logging
+        import pickle
+        import threading
+        import uuid
+        from pony.orm import db_session, select
+        from WebHostLib.customserver import DBCommandDispatcher
+        from WebHostLib.models import Command, Room, TrackerEvent
+
+        events = [{"type": "status", "team": 0, "player": 1, "status": 30}]
+        loop = asyncio.new_event_loop()
+        thread = threading.Thread(target=loop.run_forever, daemon=True)
+        thread.start()
+
+        class RoomContext:
+            room_id = self.room_id
+            main_loop = loop
+
+            async def pop_tracker_events(self) -> list:
+                return events
+
+        class FailingRoomContext:
+            main_loop = loop
+            logger = logging.getLogger("FailingRoomContext")
+
+            async def pop_tracker_events(self) -> list:
+                raise RuntimeError("Could not pop tracker events")
+
+        with db_session:
+            Command(room=Room.get(id=self.room_id), commandtext="/help")
+        commands: list = []
+        try:
+            with self.assertLogs("FailingRoomContext"):
+                DBCommandDispatcher().dispatch({uuid.uuid4(): (FailingRoomContext(), commands.append),
+                                                self.room_id: (RoomContext(), commands.append)})
+        finally:
+            loop.call_soon_threadsafe(loop.stop)
+            thread.join()
+            loop.close()
+
+        self.assertEqual(commands, ["/help"])
+        with db_session:
+            self.assertEqual(select(command for command in Command if command.room.id == self.room_id).count(), 0)
+            self.assertEqual([pickle.loads(tracker_event.events) for tracker_event in
+                              select(tracker_event for tracker_event in TrackerEvent
+                                     if tracker_event.room.id == self.room_id)], [events])
+
     def test_display_log_missing_full(self) -> None:
         """
         Verify that we get a 200 response even if log is missing.
@@ -0,0 +1,63 @@
+from datetime import datetime, timedelta
+from pathlib import Path
+from uuid import uuid4
+
+from flask import url_for
+
+from . import TestBase
+
+
+class TestStats(TestBase):
+    data: bytes
+
+    def setUp(self) -> None:
+        super().setUp()
+        with (Path(__file__).parent / "data" / "One_Archipelago.archipelago").open("rb") as f:
+            self.data = f.read()
+
+    def test_new_room_counts_games(self) -> None:
+        """Verify that creating rooms adds the slots of their seed to the aggregated stats."""
+        from pony.orm import db_session
+        from WebHostLib.models import Seed
+        from WebHostLib.stats import get_db_data, record_game_stats
+        from WebHostLib.upload import process_multidata
+
+        known_games = {"Archipelago"}
+        with self.client.session_transaction() as session:
+            session["_id"] = uuid4()
+            with db_session:
+                slots, multidata = process_multidata(self.data)
+                seed = Seed(multidata=multidata, owner=session["_id"], slots=slots)
+                total_before, _ = get_db_data(known_games)
+            seed_id = seed.id
+
+        with self.app.test_request_context():
+            response = self.client.get(url_for("new_room", seed=seed_id))
+            self.assertEqual(response.status_code, 302)
+        with db_session:
+            record_game_stats(Seed[seed_id].slots)
+            total_games, games_played = get_db_data(known_games)
+        self.assertEqual(total_games["Archipelago"] - total_before["Archipelago"], 2 * len(slots))
+        self.assertEqual(sum(total_games.values()), sum(sum(day.values()) for day in games_played.values()))
+
+    def test_rooms_before_stats(self) -> None:
+        """Verify that the days before the stats were recorded are counted from the rooms created on them."""
+        from pony.orm import db_session
+        from WebHostLib.models import GameStat, Room, Seed
+        from WebHostLib.stats import get_db_data, record_game_stats
+        from WebHostLib.upload import process_multidata
+
+        known_games = {"Archipelago"}
+        creation_time = datetime.utcnow() - timedelta(days=5)
+        with db_session:
+            slots, multidata = process_multidata(self.data)
+            GameStat.select().delete(bulk=True)
+            seed = Seed(multidata=multidata, owner=uuid4(), slots=slots)
+            Room(seed=seed, owner=seed.owner, creation_time=creation_time)
+            _, games_played = get_db_data(known_games)
+            self.assertEqual(games_played[creation_time.date()]["Archipelago"], len(slots))
+
+            record_game_stats(slots)
+            _, games_played = get_db_data(known_games)
+            self.assertEqual(games_played[creation_time.date()]["Archipelago"], len(slots))
+            self.assertEqual(games_played[datetime.utcnow().date()]["Archipelago"], len(slots))
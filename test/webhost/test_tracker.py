@@ -103,3 +103,76 @@ class TestTracker(TestBase):
                 self.assertEqual(response.status_code, 200)
             with self.client.open(url_for("api.tracker_slot_data", tracker=self.tracker_uuid)) as response:
                 self.assertEqual(response.status_code, 200)
+
+    def test_shared_seed_data(self) -> None:
+        """Verify that trackers of a room reuse the decoded multidata and lookups of its seed."""
+        from pony.orm import db_session
+        from WebHostLib.models import Room
+        from WebHostLib.tracker import TrackerData
+
+        with self.app.app_context(), db_session:
+            room = Room.get(id=self.room_id)
+            first, second = TrackerData(room), TrackerData(room)
+            self.assertIs(first._multidata, second._multidata)
+            self.assertIs(first.item_id_to_name["Archipelago"], second.item_id_to_name["Archipelago"])
+            for name, item_id in first.item_name_to_id["Archipelago"].items():
+                self.assertEqual(second.item_id_to_name["Archipelago"][item_id], name)
+            item_id_to_name = first.item_id_to_name["Archipelago"]
+            size = len(item_id_to_name)
+            self.assertEqual(item_id_to_name[-100], "Unknown Item (ID: -100)")
+            self.assertEqual(len(item_id_to_name), size, "unknown IDs should not be added to the shared lookups")
+
+    def test_tracker_events(self) -> None:
+        """Verify that tracker events api gives the events published after the requested event."""
+        from pony.orm import db_session
+        from NetUtils import NetworkItem
+        from WebHostLib.models import Room, TrackerEvent
+
+        events = [{"type": "items", "team": 0, "player": 1, "index": 0, "items": [NetworkItem(1, 2, 1, 0)]},
+                  {"type": "checks", "team": 0, "player": 1, "locations": [2]}]
+        with db_session:
+            room = Room.get(id=self.room_id)
+            first = TrackerEvent(room=room, events=pickle.dumps(events[:1]))
+            last = TrackerEvent(room=room, events=pickle.dumps(events[1:]))
+        first_id, last_id = first.id, last.id
+
+        with self.app.test_request_context():
+            url = url_for("api.tracker_events", tracker=self.tracker_uuid)
+            with self.client.open(url) as response:
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.json, {"events": [], "id": last_id})
+            with self.client.open(url, query_string={"after": 0}) as response:
+                self.assertEqual(response.json["events"], [{**events[0], "items": [[1, 2, 1, 0]]}, events[1]])
+                self.assertEqual(response.json["id"], last_id)
+            with self.client.open(url, query_string={"after": first_id}) as response:
+                self.assertEqual(response.json, {"events": [events[1]], "id": last_id})
+            with self.client.open(url, query_string={"after": last_id}) as response:
+                self.assertEqual(response.json, {"events": [], "id": last_id})
+            with db_session:
+                TrackerEvent[first_id].delete()
+            with self.client.open(url, query_string={"after": first_id}) as response:
+                self.assertEqual(response.status_code, 410)
+
+    def test_prune_tracker_events(self) -> None:
+        """Verify that expired tracker events are deleted, except for the last one of each room."""
+        from datetime import datetime, timedelta
+        from pony.orm import db_session, select
+        from WebHostLib.autolauncher import prune_tracker_events
+        from WebHostLib.models import Room, TrackerEvent
+
+        def remaining_ids() -> list[int]:
+            with db_session:
+                return select(event.id for event in TrackerEvent if event.room.id == self.room_id).order_by(1)[:]
+
+        with db_session:
+            room = Room.get(id=self.room_id)
+            TrackerEvent(room=room, events=pickle.dumps([]), time=datetime.utcnow() - timedelta(hours=2))
+            last_expired = TrackerEvent(room=room, events=pickle.dumps([]),
+                                        time=datetime.utcnow() - timedelta(hours=1))
+        prune_tracker_events()
+        self.assertEqual(remaining_ids(), [last_expired.id])
+
+        with db_session:
+            current = TrackerEvent(room=Room.get(id=self.room_id), events=pickle.dumps([]))
+        prune_tracker_events()
+        self.assertEqual(remaining_ids(), [current.id])
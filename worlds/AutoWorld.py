@@ -314,6 +314,14 @@ class World(metaclass=AutoWorldRegister):
     If False, everything is rechecked at every step, which is slower computationally, 
     but may be desirable in complex/dynamic worlds."""
 
+    rule_dependency_tracking: bool = False
+    """If True, CollectionState records which of this world's items and regions each entrance and location rule reads,
+    and only rechecks blocked entrances, or unreachable locations during a sweep, whose recorded items changed or whose
+    recorded regions became reachable.
+    Only enable this if the world's rules are derived from state.prog_items and region reachability alone,
+    not from LogicMixin attributes or other cached values; reads of other players' state are always rechecked.
+    The recording costs time as well, test/benchmark/rule_dependency_tracking.py measures whether it pays off."""
+
     multiworld: "MultiWorld"
     """autoset on creation. The MultiWorld object for the currently generating multiworld."""
     player: int
@@ -42,6 +42,8 @@ class BlasphemousWorld(World):
     options: BlasphemousOptions
 
     required_client_version = (0, 4, 7)
+    # the rules only read items and regions, and rechecking all of them after every item dominates fill time
+    rule_dependency_tracking = True
 
 
     def __init__(self, multiworld, player):